@@ -0,0 +1,115 @@
+"""
+Response Compression Benchmark
+
+Shows the bandwidth and CPU trade-offs of the codecs used by vendor_app.compression. A purchase order list payload
+of the size the list endpoint returns is compressed with each available codec at a range of levels; for each the
+compressed size, the ratio and the median compression and decompression times are printed. The middleware is then
+timed end to end on the same payload with its compressed body cache cold and warm.
+
+zstd and br are only measured when the zstandard and brotli packages are installed.
+
+Usage:
+    python benchmarks/compression.py [--orders 5000] [--runs 5]
+
+Run it from the vendor_project directory (next to manage.py).
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vendor_project.settings')
+
+LEVELS = {'gzip': (1, 6, 9), 'zstd': (1, 3, 9, 19), 'br': (1, 4, 9, 11)}
+
+
+def build_payload(orders):
+    # Shaped like a page of GET /api/purchase_orders/ output.
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    results = []
+    for number in range(orders):
+        order_date = start + timedelta(minutes=rng.randrange(500000))
+        results.append({
+            'id': number + 1,
+            'po_number': 'PO-%06d' % number,
+            'vendor': rng.randrange(1, 200),
+            'order_date': order_date.isoformat(),
+            'delivery_date': (order_date + timedelta(days=rng.randrange(1, 30))).isoformat(),
+            'items': [{'item_name': 'Item %d' % rng.randrange(1000), 'price': round(rng.uniform(1, 500), 2),
+                       'quantity': rng.randrange(1, 50)} for _ in range(rng.randrange(1, 5))],
+            'quantity': rng.randrange(1, 200),
+            'status': rng.choice(('pending', 'completed', 'canceled')),
+            'quality_rating': rng.choice((None, round(rng.uniform(1, 5), 1))),
+            'issue_date': order_date.isoformat(),
+            'acknowledgment_date': rng.choice((None, (order_date + timedelta(hours=5)).isoformat())),
+            'version': rng.randrange(1, 10),
+        })
+    return json.dumps({'count': orders, 'next': None, 'previous': None, 'results': results}).encode()
+
+
+def decompressor(name):
+    if name == 'gzip':
+        return gzip.decompress
+    if name == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress
+    import brotli
+    return brotli.decompress
+
+
+def median_ms(function, argument, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function(argument)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=5000, help='Purchase orders in the payload.')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per measurement; the median is reported.')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    from vendor_app.compression import Codec, CompressionMiddleware, get_codecs
+
+    payload = build_payload(args.orders)
+    print('payload: %d orders, %.1f KiB' % (args.orders, len(payload) / 1024))
+    print('%-5s %5s %10s %7s %12s %14s' % ('codec', 'level', 'KiB', 'ratio', 'compress ms', 'decompress ms'))
+    for codec in get_codecs():
+        for level in LEVELS[codec.name]:
+            compress_ms, body = median_ms(Codec(codec.name, level).compress, payload, args.runs)
+            decompress_ms, _ = median_ms(decompressor(codec.name), body, args.runs)
+            print('%-5s %5d %10.1f %6.1fx %12.2f %14.2f' % (
+                codec.name, level, len(body) / 1024, len(payload) / len(body), compress_ms, decompress_ms))
+
+    request = RequestFactory().get('/api/purchase_orders/', HTTP_ACCEPT_ENCODING='zstd, br, gzip')
+    get_response = lambda request: HttpResponse(payload, content_type='application/json')  # noqa: E731
+    identity_ms, _ = median_ms(get_response, request, args.runs)
+    cold_timings = []
+    for _ in range(args.runs):
+        middleware = CompressionMiddleware(get_response)
+        cold_ms, response = median_ms(middleware, request, 1)
+        cold_timings.append(cold_ms)
+    warm_ms, _ = median_ms(middleware, request, args.runs)
+    print('middleware (%s): uncompressed %.2f ms, cold cache %.2f ms, warm cache %.2f ms' % (
+        response['Content-Encoding'], identity_ms, statistics.median(cold_timings), warm_ms))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Group Commit Benchmark
+
+Measures purchase order create throughput under concurrent load with PURCHASE_ORDER_GROUP_COMMIT disabled and
+enabled. Each mode runs in a new interpreter against a fresh file-backed SQLite database, so every commit pays for
+a real fsync; a number of client threads then POST purchase orders through the full request stack as fast as they
+can, spread over a handful of vendors.
+
+Usage:
+    python benchmarks/group_commit.py [--threads 16] [--orders 50] [--vendors 8]
+
+Run it from the vendor_project directory (next to manage.py).
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter: group_commit, threads, orders per thread, vendors.
+CHILD = """
+import json, os, sys, tempfile, threading, time
+os.environ['DJANGO_SETTINGS_MODULE'] = 'vendor_project.settings'
+group_commit, threads, orders, vendors = json.loads(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+settings.PURCHASE_ORDER_GROUP_COMMIT = group_commit
+settings.VENDOR_THROTTLE_RATES = {}
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+setup_test_environment()
+call_command('migrate', verbosity=0)
+token = Token.objects.create(user=User.objects.create_user('bench')).key
+
+statuses = []
+errors = []
+
+def client_thread(number):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+    for i in range(orders):
+        # A request raising (e.g. "database is locked") counts as failed instead of ending the thread silently.
+        try:
+            response = client.post('/api/purchase_orders/', {
+                'po_number': 'PO-%d-%d' % (number, i), 'vendor_code': 'V%d' % (i % vendors),
+                'order_date': '2024-01-01T00:00:00Z', 'delivery_date': '2024-01-10T00:00:00Z',
+                'items': [{'item_name': 'A', 'price': 2.5, 'quantity': 2}], 'quantity': 2, 'status': 'pending',
+                'issue_date': '2024-01-01T00:00:00Z'}, format='json')
+        except Exception as exc:
+            statuses.append(None)
+            errors.append(repr(exc))
+        else:
+            statuses.append(response.status_code)
+    connection.close()
+
+# Create the vendors up front, so the measured writes only insert purchase orders.
+client_thread(-1)
+statuses.clear()
+workers = [threading.Thread(target=client_thread, args=(number,)) for number in range(threads)]
+start = time.perf_counter()
+for worker in workers:
+    worker.start()
+for worker in workers:
+    worker.join()
+elapsed = time.perf_counter() - start
+
+print(json.dumps({'elapsed': elapsed, 'created': statuses.count(201), 'failed': len(statuses) - statuses.count(201),
+                  'errors': sorted(set(errors))}))
+"""
+
+
+def measure(group_commit, threads, orders, vendors):
+    output = subprocess.run([sys.executable, '-c', CHILD, json.dumps(group_commit), str(threads), str(orders),
+                             str(vendors)], cwd=PROJECT_DIR, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent client threads.')
+    parser.add_argument('--orders', type=int, default=50, help='Purchase orders created per thread.')
+    parser.add_argument('--vendors', type=int, default=8, help='Vendors the purchase orders are spread over.')
+    args = parser.parse_args()
+
+    rates = {}
+    for group_commit in (False, True):
+        result = measure(group_commit, args.threads, args.orders, args.vendors)
+        rates[group_commit] = result['created'] / result['elapsed']
+        print('group commit %-3s  %5d created  %4d failed  %8.1f orders/s' % (
+            'on' if group_commit else 'off', result['created'], result['failed'], rates[group_commit]))
+        for error in result['errors']:
+            print('  error: %s' % error)
+    if not rates[False]:
+        print('no purchase orders were created without group commit; cannot compute a speedup', file=sys.stderr)
+        return 1
+    print('speedup: %.2fx' % (rates[True] / rates[False]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Startup Benchmark
+
+Measures what a freshly started worker pays before serving traffic: the time django.setup() takes and the latency
+of the first request, each in a new interpreter process so that nothing is already imported. The default settings
+and the API-only profile (vendor_project.settings_api) are measured side by side.
+
+The script exits with status 1 if the median of the API-only profile exceeds the import-time budget, so it can
+guard against regressions in CI.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--setup-budget-ms 400] [--request-budget-ms 200]
+
+Run it from the vendor_project directory (next to manage.py).
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+PROFILES = ('vendor_project.settings', 'vendor_project.settings_api')
+
+# Runs in a fresh interpreter; the test database is created between the two measurements.
+CHILD = """
+import json, os, sys, time
+os.environ['DJANGO_SETTINGS_MODULE'] = sys.argv[1]
+
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - start
+
+from django.test.utils import setup_databases, setup_test_environment
+setup_test_environment()
+setup_databases(verbosity=0, interactive=False)
+
+from django.test import Client
+client = Client()
+start = time.perf_counter()
+response = client.get('/api/vendors/')
+first_request = time.perf_counter() - start
+assert response.status_code == 200, response.status_code
+
+print(json.dumps({'setup_ms': setup * 1000, 'first_request_ms': first_request * 1000}))
+"""
+
+
+def measure(settings_module):
+    output = subprocess.run([sys.executable, '-c', CHILD, settings_module], cwd=PROJECT_DIR,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Fresh processes per settings profile.')
+    parser.add_argument('--setup-budget-ms', type=float, default=400,
+                        help='Budget for the median django.setup() time of the API-only profile.')
+    parser.add_argument('--request-budget-ms', type=float, default=200,
+                        help='Budget for the median first-request latency of the API-only profile.')
+    args = parser.parse_args()
+
+    medians = {}
+    for settings_module in PROFILES:
+        runs = [measure(settings_module) for _ in range(args.runs)]
+        medians[settings_module] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print('%-30s django.setup() %7.1f ms   first request %7.1f ms' % (
+            settings_module, medians[settings_module]['setup_ms'], medians[settings_module]['first_request_ms']))
+
+    api = medians['vendor_project.settings_api']
+    failures = []
+    if api['setup_ms'] > args.setup_budget_ms:
+        failures.append('django.setup() took %.1f ms (budget %.1f ms)' % (api['setup_ms'], args.setup_budget_ms))
+    if api['first_request_ms'] > args.request_budget_ms:
+        failures.append('first request took %.1f ms (budget %.1f ms)' % (
+            api['first_request_ms'], args.request_budget_ms))
+
+    for failure in failures:
+        print('BUDGET EXCEEDED: %s' % failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,128 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
 from rest_framework.authtoken.models import Token
 
+from .models import HistoricalPerformance, PurchaseOrder, Vendor
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator estimating the size of unfiltered changelists instead of running COUNT(*) over the whole table.
+
+    PostgreSQL's planner statistics are used where available, otherwise the highest primary key, which
+    over-counts by the deleted rows. Filtered changelists are counted exactly; their filters are indexed.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where != queryset.model._default_manager.all().query.where:
+            return super().count
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return int(row[0])
+        return queryset.aggregate(last=Max('pk'))['last'] or 0
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for large tables: estimated counts, no second full-table count and a stable pk ordering.
+
+    Searches match the search_fields exactly, so they are answered from the unique indexes instead of
+    the case-insensitive pattern scans of the default admin search.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+    # Columns left out of changelist queries; the change form still shows them.
+    changelist_deferred_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        condition = Q()
+        for field in self.search_fields:
+            condition |= Q(**{field: search_term})
+        return queryset.filter(condition), False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.changelist_deferred_fields and request.resolver_match.url_name.endswith('_changelist'):
+            queryset = queryset.defer(*self.changelist_deferred_fields)
+        return queryset
+
+
+@admin.register(Vendor)
+class VendorAdmin(ScalableModelAdmin):
+    list_display = ('vendor_code', 'name', 'on_time_delivery_rate', 'quality_rating_avg', 'average_response_time',
+                    'fulfillment_rate')
+    search_fields = ('vendor_code',)
+    readonly_fields = ('on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfillment_rate',
+                       'response_time_count', 'deleted_at', 'version', 'updated_at')
+
+    # Deleting goes through Vendor.mark_deleted(): the vendor disappears at once and its purchase orders, history
+    # and sketches are purged in batches by the purge_deleted_vendors worker instead of one cascading delete.
+    def delete_model(self, request, obj):
+        obj.mark_deleted()
+
+    def delete_queryset(self, request, queryset):
+        for vendor in queryset:
+            vendor.mark_deleted()
+
+    def get_deleted_objects(self, objs, request):
+        # The confirmation page lists the vendors only; collecting every dependent row is what the purge avoids.
+        deleted_objects, model_count, perms_needed, protected = [], {}, set(), []
+        for obj in objs:
+            deleted_objects.append(str(obj))
+        if deleted_objects:
+            model_count[Vendor._meta.verbose_name_plural] = len(deleted_objects)
+        if not self.has_delete_permission(request):
+            perms_needed.add(Vendor._meta.verbose_name)
+        return deleted_objects, model_count, perms_needed, protected
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(ScalableModelAdmin):
+    list_display = ('po_number', 'vendor', 'status', 'order_date', 'delivery_date', 'total_amount',
+                    'acknowledgment_date')
+    list_filter = ('status',)
+    list_select_related = ('vendor',)
+    search_fields = ('po_number',)
+    raw_id_fields = ('vendor',)
+    readonly_fields = ('total_amount', 'completed_at', 'on_time', 'version', 'updated_at')
+    changelist_deferred_fields = ('items',)
+
+
+@admin.register(HistoricalPerformance)
+class HistoricalPerformanceAdmin(ScalableModelAdmin):
+    list_display = ('vendor', 'date', 'on_time_delivery_rate', 'quality_rating_avg', 'average_response_time',
+                    'fulfillment_rate')
+    list_select_related = ('vendor',)
+    raw_id_fields = ('vendor',)
+
+
 class CustomUserAdmin(UserAdmin):
     actions = ['generate_tokens']
 
     def generate_tokens(self, request, queryset):
-        for user in queryset:
-            Token.objects.get_or_create(user=user)
+        # Tokens are created in one INSERT; bulk_create bypasses Token.save(), so the keys are generated here.
+        missing = list(queryset.filter(auth_token__isnull=True).values_list('pk', flat=True))
+        Token.objects.bulk_create([Token(key=Token.generate_key(), user_id=pk) for pk in missing],
+                                  ignore_conflicts=True)
+        # bulk_create returns every object passed with ignore_conflicts, so the tokens are counted afterwards.
+        generated = Token.objects.filter(user_id__in=missing).count()
+        self.message_user(request, "Generated %d tokens." % generated)
 
     generate_tokens.short_description = "Generate tokens for selected users"
 
@@ -5,3 +5,6 @@ class VendorAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vendor_app'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
@@ -0,0 +1,76 @@
+"""
+Archival of Closed Purchase Orders
+
+This module moves closed (completed or cancelled) purchase orders that have not changed for a configurable
+number of days from the PurchaseOrder table into ArchivedPurchaseOrder, keeping the live table and its indexes small.
+
+Functions:
+- get_archive_cutoff: Return the time before which closed purchase orders are archived.
+- archive_purchase_orders: Archive closed purchase orders in chunked batches.
+
+Each chunk is archived in its own transaction: the rows are copied to the archive, their metric contributions are
+added to the per-vendor VendorArchiveSummary rows, and the live rows and their line items are deleted. Vendor metrics
+therefore stay the same without being recomputed.
+
+The live rows are removed with raw DELETE statements, like the vendor purge (see vendor_app.deletion), so no per-row
+signals are dispatched; the change log gets one 'archived' entry per purchase order instead of a 'deleted' one.
+
+Settings:
+- PURCHASE_ORDER_ARCHIVE_AFTER_DAYS: Age in days after which closed purchase orders are archived (default 365).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedPurchaseOrder, ChangeLogEntry, PurchaseOrder, PurchaseOrderLine, VendorArchiveSummary
+
+
+def get_archive_cutoff(days=None):
+    if days is None:
+        days = getattr(settings, 'PURCHASE_ORDER_ARCHIVE_AFTER_DAYS', 365)
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_purchase_orders(cutoff, chunk_size=1000):
+    """
+    Archive closed purchase orders last updated before `cutoff`.
+
+    Args:
+    - cutoff (datetime): Closed purchase orders last updated before this time are archived.
+    - chunk_size (int): The number of purchase orders archived per transaction.
+
+    Returns:
+    - int: The number of archived purchase orders.
+    """
+    archivable = PurchaseOrder.objects.filter(status__in=PurchaseOrder.CLOSED_STATUSES, updated_at__lt=cutoff)
+    archived = 0
+
+    while True:
+        with transaction.atomic():
+            chunk = list(archivable.select_for_update().order_by('id')[:chunk_size])
+            if not chunk:
+                break
+
+            ArchivedPurchaseOrder.objects.bulk_create([
+                ArchivedPurchaseOrder(**{field: getattr(po, field) for field in ArchivedPurchaseOrder.COPIED_FIELDS})
+                for po in chunk
+            ])
+
+            by_vendor = defaultdict(list)
+            for po in chunk:
+                by_vendor[po.vendor_id].append(po)
+            for vendor_id, purchase_orders in by_vendor.items():
+                VendorArchiveSummary.add_purchase_orders(vendor_id, purchase_orders)
+
+            ids = [po.id for po in chunk]
+            for queryset in (PurchaseOrderLine.objects.filter(purchase_order_id__in=ids),
+                             PurchaseOrder.objects.filter(id__in=ids)):
+                queryset._raw_delete(queryset.db)
+            ChangeLogEntry.record(PurchaseOrder, 'archived', ids)
+
+        archived += len(chunk)
+
+    return archived
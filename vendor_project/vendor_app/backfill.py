@@ -0,0 +1,159 @@
+"""
+Historical Performance Backfill
+
+HistoricalPerformance snapshots have only been saved recently. This module rebuilds the earlier history from the
+purchase orders themselves: it streams the live and archived purchase orders once, ordered by order date, keeps
+running metric counters per vendor and writes a snapshot of every vendor at each period boundary.
+
+Functions:
+- get_period_start: Return the start of the period (week by default) containing a time.
+- get_backfill_until: Return the default cutoff, the date of the first snapshot saved by the application.
+- backfill_historical_performance: Write the snapshots for the periods before a cutoff.
+
+Each purchase order counts towards the snapshots from its order date on; it counts as completed (and rated) from its
+completed_at and as acknowledged from its acknowledgment date. Those later events wait in a heap until the stream
+passes their time, so memory holds the per-vendor counters and the events of orders still open at the current
+position, never the whole history. The snapshots apply the formulas of the Vendor.calculate_* methods to the
+counters.
+"""
+import heapq
+import itertools
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import ArchivedPurchaseOrder, HistoricalPerformance, PurchaseOrder, Vendor
+
+STREAMED_FIELDS = ('order_date', 'vendor_id', 'status', 'completed_at', 'on_time', 'quality_rating', 'issue_date',
+                   'acknowledgment_date')
+
+COMPLETED, ACKNOWLEDGED = 0, 1
+
+
+class VendorCounters:
+    __slots__ = ('total_pos', 'completed_pos', 'on_time_pos', 'rated_pos', 'quality_rating_sum', 'acknowledged_pos',
+                 'response_time_sum')
+
+    def __init__(self):
+        self.total_pos = self.completed_pos = self.on_time_pos = self.rated_pos = self.acknowledged_pos = 0
+        self.quality_rating_sum = self.response_time_sum = 0.0
+
+    def get_snapshot(self, vendor_id, date):
+        return HistoricalPerformance(
+            vendor_id=vendor_id,
+            date=date,
+            on_time_delivery_rate=self.on_time_pos / self.completed_pos * 100 if self.completed_pos else 0,
+            quality_rating_avg=self.quality_rating_sum / self.rated_pos if self.rated_pos else 0,
+            average_response_time=self.response_time_sum / self.acknowledged_pos if self.acknowledged_pos else 0,
+            fulfillment_rate=self.completed_pos / self.total_pos * 100 if self.total_pos else 0,
+            backfilled=True,
+        )
+
+
+def get_period_start(moment, period_days=7):
+    """
+    Return the start of the period containing `moment`: the Monday midnight of its week for weekly periods,
+    its midnight otherwise.
+    """
+    day = timezone.localtime(moment).date()
+    if period_days == 7:
+        day -= timedelta(days=day.weekday())
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_backfill_until():
+    """
+    Return the date of the first snapshot saved by the application, or now if there is none.
+
+    Snapshots written by the backfill are ignored, so an interrupted run repeated with the default cutoff covers the
+    same periods again.
+    """
+    first = HistoricalPerformance.objects.filter(backfilled=False).aggregate(first=Min('date'))['first']
+    return first or timezone.now()
+
+
+def _stream_purchase_orders(chunk_size):
+    # Live and archived orders merged into one stream, each read in order_date index order.
+    streams = [model.objects.order_by('order_date').values_list(*STREAMED_FIELDS).iterator(chunk_size=chunk_size)
+               for model in (PurchaseOrder, ArchivedPurchaseOrder)]
+    return heapq.merge(*streams, key=lambda row: row[0])
+
+
+def backfill_historical_performance(until, period_days=7, batch_size=1000, chunk_size=2000):
+    """
+    Write a HistoricalPerformance snapshot of every vendor at each period boundary before `until`.
+
+    Backfilled snapshots between the first boundary and `until` left by an earlier run are replaced; snapshots saved
+    by the application are kept. The snapshots are committed batch by batch, so the backfill never holds a long write
+    transaction; an interrupted run is simply repeated.
+
+    Args:
+    - until (datetime): No snapshots are written at or after this time, typically the date of the first
+      snapshot saved by the application (see get_backfill_until).
+    - period_days (int): The length of the periods; weekly periods start on Mondays.
+    - batch_size (int): Number of snapshots per bulk_create.
+    - chunk_size (int): Number of purchase orders fetched per database round trip.
+
+    Returns:
+    - int: The number of snapshots written.
+    """
+    period = timedelta(days=period_days)
+    deleted_vendors = set(Vendor.all_objects.filter(deleted_at__isnull=False).values_list('id', flat=True))
+    counters = defaultdict(VendorCounters)
+    events = []
+    sequence = itertools.count()
+    pending = []
+    written = 0
+    boundary = None
+
+    def apply_events_before(moment):
+        while events and events[0][0] < moment:
+            _, _, kind, vendor_id, value = heapq.heappop(events)
+            vendor = counters[vendor_id]
+            if kind == COMPLETED:
+                on_time, quality_rating = value
+                vendor.completed_pos += 1
+                vendor.on_time_pos += bool(on_time)
+                if quality_rating is not None:
+                    vendor.rated_pos += 1
+                    vendor.quality_rating_sum += quality_rating
+            else:
+                vendor.acknowledged_pos += 1
+                vendor.response_time_sum += value
+
+    def write_snapshots(date):
+        nonlocal written
+        apply_events_before(date)
+        pending.extend(vendor.get_snapshot(vendor_id, date) for vendor_id, vendor in counters.items())
+        if len(pending) >= batch_size:
+            HistoricalPerformance.objects.bulk_create(pending, batch_size=batch_size)
+            written += len(pending)
+            pending.clear()
+
+    for order_date, vendor_id, *row in _stream_purchase_orders(chunk_size):
+        if order_date >= until:
+            break
+        if boundary is None:
+            boundary = get_period_start(order_date, period_days) + period
+            HistoricalPerformance.objects.filter(backfilled=True, date__gte=boundary, date__lt=until).delete()
+        while order_date >= boundary:
+            write_snapshots(boundary)
+            boundary += period
+        if vendor_id in deleted_vendors:
+            continue
+
+        status, completed_at, on_time, quality_rating, issue_date, acknowledgment_date = row
+        counters[vendor_id].total_pos += 1
+        if status == 'completed' and completed_at is not None:
+            heapq.heappush(events, (completed_at, next(sequence), COMPLETED, vendor_id, (on_time, quality_rating)))
+        if acknowledgment_date is not None:
+            response_time = (acknowledgment_date - issue_date).total_seconds() / 60  # in minutes
+            heapq.heappush(events, (acknowledgment_date, next(sequence), ACKNOWLEDGED, vendor_id, response_time))
+
+    while boundary is not None and boundary < until:
+        write_snapshots(boundary)
+        boundary += period
+    HistoricalPerformance.objects.bulk_create(pending, batch_size=batch_size)
+    return written + len(pending)
@@ -0,0 +1,151 @@
+"""
+Group Commit for Purchase Order Writes
+
+With SQLite every write transaction ends with its own fsync, so creating purchase orders one request at a time is
+bounded by the disk's sync rate rather than by the work per insert. When group commit is enabled, concurrent
+purchase order creates are handed to a committer thread that waits a few milliseconds for further writes and then
+runs them together in one transaction.
+
+Classes:
+- GroupCommitter: Collects write operations from request threads and commits them in shared transactions.
+
+Functions:
+- get_group_committer: Return the process-wide GroupCommitter.
+- defer_vendor_metrics: Postpone a vendor metric recalculation to the end of the current batch.
+
+Settings:
+- PURCHASE_ORDER_GROUP_COMMIT: Whether purchase order creates are group committed (default False).
+- PURCHASE_ORDER_GROUP_COMMIT_WAIT_MS: How long a batch waits for further writes after its first one.
+- PURCHASE_ORDER_GROUP_COMMIT_MAX_BATCH: Maximum number of writes per batch.
+
+Each write runs in its own savepoint, so a failing write is rolled back and reported to its caller alone; callers
+only get their result once the batch has committed. The metric recalculations triggered by the writes of a batch
+are merged and run once per vendor before the commit.
+
+Batches only form from writes arriving concurrently, i.e. with a threaded WSGI server. Under ASGI, synchronous views
+of one process run on a single thread, so every batch holds one write.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+_batch = threading.local()
+
+
+def defer_vendor_metrics(vendor_id, metrics):
+    """
+    Postpone recalculating `metrics` of a vendor to the end of the batch running in this thread.
+
+    Returns:
+    - bool: Whether the recalculation was postponed; False outside of a batch.
+    """
+    pending = getattr(_batch, 'metrics', None)
+    if pending is None:
+        return False
+    pending.setdefault(vendor_id, set()).update(metrics)
+    return True
+
+
+class GroupCommitter:
+    """
+    Runs write operations submitted by request threads in shared transactions on a committer thread.
+    """
+
+    def __init__(self, max_wait=0.005, max_batch=100):
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, operation):
+        """
+        Run `operation()` in the next batch and wait until the batch has committed.
+
+        Returns:
+            The return value of the operation.
+
+        Raises:
+            The exception raised by the operation, or by the commit of its batch.
+        """
+        self._start()
+        future = Future()
+        self._queue.put((operation, future))
+        return future.result()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            close_old_connections()
+            try:
+                results = self._commit(batch)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), (result, error) in zip(batch, results):
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def _commit(self, batch):
+        results = []
+        _batch.metrics = {}
+        try:
+            with transaction.atomic():
+                for operation, _ in batch:
+                    try:
+                        with transaction.atomic():
+                            results.append((operation(), None))
+                    except Exception as exc:
+                        results.append((None, exc))
+                self._recalculate_metrics(_batch.metrics)
+        finally:
+            _batch.metrics = None
+        return results
+
+    def _recalculate_metrics(self, pending):
+        from .models import Vendor
+
+        for vendor in Vendor.objects.filter(id__in=pending):
+            vendor.calculate_metrics([metric for metric in Vendor.METRICS if metric in pending[vendor.id]])
+
+
+_group_committer = None
+_group_committer_lock = threading.Lock()
+
+
+def get_group_committer():
+    global _group_committer
+    with _group_committer_lock:
+        if _group_committer is None:
+            _group_committer = GroupCommitter(
+                max_wait=getattr(settings, 'PURCHASE_ORDER_GROUP_COMMIT_WAIT_MS', 5) / 1000,
+                max_batch=getattr(settings, 'PURCHASE_ORDER_GROUP_COMMIT_MAX_BATCH', 100),
+            )
+        return _group_committer
@@ -0,0 +1,249 @@
+"""
+Negotiated Response Compression
+
+The list endpoints return several megabytes of JSON. This module compresses responses with the best encoding the
+client accepts, and caches compressed bodies so hot lists are not recompressed for every request.
+
+Classes:
+- Codec: A content coding (gzip, zstd or br) with one-shot and incremental compression.
+- CompressedBodyCache: A thread-safe LRU cache of compressed bodies, bounded by their total size.
+- CompressionMiddleware: Middleware compressing responses according to the request's Accept-Encoding.
+
+Functions:
+- get_codecs: Return the available codecs in server preference order.
+- negotiate: Pick the codec for an Accept-Encoding header.
+
+Settings:
+- RESPONSE_COMPRESSION_CODECS: Codec names in order of preference (default zstd, br, gzip). zstd and br are only
+  offered when the zstandard and brotli packages are installed.
+- RESPONSE_COMPRESSION_LEVELS: Compression level per codec name.
+- RESPONSE_COMPRESSION_MIN_SIZE: Bodies smaller than this many bytes are sent uncompressed.
+- RESPONSE_COMPRESSION_CACHE_BYTES: Total size of the cached compressed bodies; 0 disables the cache.
+
+Compressed bodies of successful GET responses are cached under the codec and a digest of the uncompressed body, so
+identical bodies share one entry whoever requested them, and any change to the body is a cache miss. Streaming
+responses are compressed chunk by chunk and never cached; event streams are left alone, since compression would hold
+back events until enough data accumulated.
+
+ETags are left as they are: the detail views derive them from the row version, which identifies the object state
+whatever the content coding, and clients send them back in If-Match after decoding. Vary: Accept-Encoding keeps shared
+caches from serving one coding for another.
+"""
+import gzip
+import hashlib
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'application/xml')
+ACCEPT_ENCODING_RE = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+class Codec:
+    """
+    A content coding with one-shot and streaming compression at a fixed level.
+    """
+
+    def __init__(self, name, level):
+        self.name = name
+        self.level = level
+
+    def compress(self, data):
+        if self.name == 'gzip':
+            return gzip.compress(data, compresslevel=self.level, mtime=0)
+        if self.name == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return brotli.compress(data, quality=self.level)
+
+    def _compressor(self):
+        # Returns the (process, finish) functions of a new incremental compressor.
+        if self.name == 'gzip':
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            return compressor.compress, compressor.flush
+        if self.name == 'zstd':
+            compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+            return compressor.compress, compressor.flush
+        compressor = brotli.Compressor(quality=self.level)
+        return compressor.process, compressor.finish
+
+    def compress_stream(self, chunks):
+        """
+        Compress an iterable of byte chunks, yielding compressed chunks as they become available.
+        """
+        process, finish = self._compressor()
+        for chunk in chunks:
+            data = process(chunk)
+            if data:
+                yield data
+        yield finish()
+
+    async def acompress_stream(self, chunks):
+        """
+        Compress an async iterable of byte chunks, like compress_stream.
+        """
+        process, finish = self._compressor()
+        async for chunk in chunks:
+            data = process(chunk)
+            if data:
+                yield data
+        yield finish()
+
+
+def get_codecs():
+    """
+    Return the codecs enabled in RESPONSE_COMPRESSION_CODECS whose libraries are installed, in preference order.
+    """
+    available = {'gzip': True, 'zstd': zstandard is not None, 'br': brotli is not None}
+    default_levels = {'gzip': 6, 'zstd': 3, 'br': 4}
+    levels = {**default_levels, **getattr(settings, 'RESPONSE_COMPRESSION_LEVELS', {})}
+    return [Codec(name, levels[name]) for name in getattr(settings, 'RESPONSE_COMPRESSION_CODECS',
+                                                           ('zstd', 'br', 'gzip'))
+            if available.get(name)]
+
+
+def negotiate(accept_encoding, codecs):
+    """
+    Pick the codec for an Accept-Encoding header: the client's highest weighted coding, the server's preference
+    breaking ties. `*` stands for any coding not listed.
+
+    Returns:
+    - Codec: The chosen codec, or None if the response should not be compressed.
+    """
+    weights = {}
+    for part in accept_encoding.lower().split(','):
+        match = ACCEPT_ENCODING_RE.fullmatch(part)
+        if match:
+            try:
+                weights[match.group(1)] = float(match.group(2) or 1)
+            except ValueError:
+                continue
+    best, best_weight = None, 0
+    for codec in codecs:
+        weight = weights.get(codec.name, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = codec, weight
+    return best
+
+
+class CompressedBodyCache:
+    """
+    LRU cache of compressed bodies, evicting the least recently used ones beyond `max_bytes` in total.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """
+    Middleware compressing responses with the codec negotiated from Accept-Encoding.
+
+    Place it near the top of MIDDLEWARE, so that it sees the final response body. It supports both WSGI and ASGI;
+    under ASGI, responses it leaves alone (event streams among them) are passed on without any sync adaptation, and
+    large bodies are compressed on a worker thread so that the event loop is not blocked.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.codecs = get_codecs()
+        self.min_size = getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', 1024)
+        cache_bytes = getattr(settings, 'RESPONSE_COMPRESSION_CACHE_BYTES', 64 * 1024 * 1024)
+        self.cache = CompressedBodyCache(cache_bytes) if cache_bytes else None
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if not self.is_compressible(response):
+            return response
+        return self.compress_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if not self.is_compressible(response):
+            return response
+        if response.streaming or len(response.content) < self.min_size:
+            return self.compress_response(request, response)
+        return await sync_to_async(self.compress_response, thread_sensitive=False)(request, response)
+
+    def compress_response(self, request, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.codecs)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = codec.acompress_stream(response.streaming_content)
+            else:
+                response.streaming_content = codec.compress_stream(response.streaming_content)
+            del response['Content-Length']
+        else:
+            if len(response.content) < self.min_size:
+                return response
+            response.content = self.compress(request, response, codec)
+            response.headers['Content-Length'] = str(len(response.content))
+
+        response.headers['Content-Encoding'] = codec.name
+        return response
+
+    def is_compressible(self, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type == 'text/event-stream':
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def compress(self, request, response, codec):
+        if self.cache is None or request.method != 'GET' or response.status_code != 200:
+            return codec.compress(response.content)
+        key = (codec.name, codec.level, hashlib.blake2b(response.content, digest_size=16).digest())
+        body = self.cache.get(key)
+        if body is None:
+            body = codec.compress(response.content)
+            self.cache.set(key, body)
+        return body
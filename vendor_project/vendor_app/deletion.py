@@ -0,0 +1,122 @@
+"""
+Background Purge of Deleted Vendors
+
+Deleting a vendor through the API only marks it deleted (see Vendor.mark_deleted) and queues a VendorDeletion. This
+module purges the vendor and its dependent rows afterwards, so large vendors neither time out the request nor hold
+locks for the duration of one huge cascade.
+
+Functions:
+- count_vendor_rows: Count the rows that purging a vendor will remove.
+- purge_vendor: Purge a vendor and its dependent rows in bounded batches, recording progress on the deletion.
+- process_pending_deletions: Purge every vendor whose deletion is pending, was interrupted or failed.
+
+Rows are removed with raw DELETE statements in batches of primary keys, children before parents. Unlike
+Model.delete(), this neither loads the rows into memory for the deletion collector nor dispatches per-row signals;
+the purged purchase orders are written to the change log once per batch instead.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    ArchivedPurchaseOrder,
+    ChangeLogEntry,
+    HistoricalPerformance,
+    PurchaseOrder,
+    PurchaseOrderLine,
+    ResponseTimeBucket,
+    Vendor,
+    VendorArchiveSummary,
+    VendorDeletion,
+)
+from .vendor_codes import vendor_code_cache
+
+# Dependent tables in deletion order, with the lookup selecting the rows of a vendor.
+PURGE_ORDER = (
+    (PurchaseOrderLine, 'vendor_id'),
+    (PurchaseOrder, 'vendor_id'),
+    (ArchivedPurchaseOrder, 'vendor_id'),
+    (VendorArchiveSummary, 'vendor_id'),
+    (ResponseTimeBucket, 'vendor_id'),
+    (HistoricalPerformance, 'vendor_id'),
+    (Vendor, 'id'),
+)
+
+
+def _get_queryset(model, lookup, vendor_id):
+    # The base manager also sees vendors hidden by VendorManager.
+    return model._base_manager.filter(**{lookup: vendor_id})
+
+
+def count_vendor_rows(vendor_id):
+    return sum(_get_queryset(model, lookup, vendor_id).count() for model, lookup in PURGE_ORDER)
+
+
+def _delete_rows(model, ids):
+    batch = model._base_manager.filter(pk__in=ids)
+    deleted = batch._raw_delete(batch.db)
+    if model is PurchaseOrder:
+        ChangeLogEntry.record(PurchaseOrder, 'deleted', ids)
+    return deleted
+
+
+def purge_vendor(deletion, batch_size=1000):
+    """
+    Purge the vendor of a VendorDeletion and its dependent rows.
+
+    Each batch is deleted in its own transaction together with the progress update, so an interrupted purge can
+    simply be started again. The vendor row goes last, under a row lock and together with any dependent rows written
+    after their table was purged, e.g. by a worker whose vendor code cache still held the vendor.
+
+    Args:
+    - deletion (VendorDeletion): The deletion to process.
+    - batch_size (int): The maximum number of rows deleted per statement.
+    """
+    deletion.status = 'running'
+    deletion.error = ''
+    deletion.total_rows = deletion.deleted_rows + count_vendor_rows(deletion.vendor_id)
+    deletion.save(update_fields=['status', 'error', 'total_rows'])
+
+    for model, lookup in PURGE_ORDER[:-1]:
+        queryset = _get_queryset(model, lookup, deletion.vendor_id)
+        while True:
+            with transaction.atomic():
+                ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                deletion.deleted_rows += _delete_rows(model, ids)
+                deletion.save(update_fields=['deleted_rows'])
+
+    with transaction.atomic():
+        # Purchase order writes lock the vendor row (see PurchaseOrderSerializer.create), so none can slip in
+        # between this sweep and the vendor delete.
+        list(Vendor._base_manager.select_for_update().filter(id=deletion.vendor_id).values_list('id'))
+        for model, lookup in PURGE_ORDER:
+            ids = list(_get_queryset(model, lookup, deletion.vendor_id).values_list('pk', flat=True))
+            if ids:
+                deletion.deleted_rows += _delete_rows(model, ids)
+        deletion.status = 'completed'
+        deletion.finished_at = timezone.now()
+        deletion.save(update_fields=['deleted_rows', 'status', 'finished_at'])
+    # The raw deletes bypass the signals, so the code is released from this process's cache here.
+    vendor_code_cache.invalidate(deletion.vendor_code, deletion.vendor_id)
+
+
+def process_pending_deletions(batch_size=1000):
+    """
+    Purge every vendor whose deletion is pending, was interrupted while running, or failed.
+
+    A deletion that raises is marked failed with the error and retried by the next run; the purge is idempotent.
+
+    Returns:
+    - list: The processed VendorDeletion instances.
+    """
+    processed = []
+    for deletion in VendorDeletion.objects.filter(status__in=('pending', 'running', 'failed')).order_by('id'):
+        try:
+            purge_vendor(deletion, batch_size=batch_size)
+        except Exception as exc:
+            deletion.status = 'failed'
+            deletion.error = str(exc)
+            deletion.save(update_fields=['status', 'error'])
+        processed.append(deletion)
+    return processed
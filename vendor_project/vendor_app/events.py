@@ -0,0 +1,209 @@
+"""
+Vendor Metric Events
+
+This module pushes vendor performance metrics to subscribers whenever they are recomputed, so dashboards can
+listen on VendorMetricsStreamView (server-sent events) instead of polling VendorPerformanceView.
+
+Classes:
+- Subscription: The metric updates pending for one client, coalesced per vendor.
+- InProcessBroker: Broker delivering updates published in this process to subscriptions in this process.
+- ChangeLogBroker: Broker for multi-worker deployments, picking up the updates of every worker from the change log.
+
+Functions:
+- get_broker: Return the process-wide broker configured by VENDOR_EVENTS_BROKER.
+- publish_vendor_metrics: Publish the current metrics of a vendor to its subscribers.
+
+Backpressure: a subscription only keeps the latest pending metrics of each vendor, so a slow client receives the
+newest state once it catches up instead of an unbounded backlog of intermediate states.
+
+Settings:
+- VENDOR_EVENTS_BROKER: Dotted path of the broker class (default 'vendor_app.events.InProcessBroker').
+- VENDOR_EVENTS_POLL_SECONDS: Polling interval of ChangeLogBroker (default 1).
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Max
+from django.utils.module_loading import import_string
+
+METRIC_FIELDS = ('on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfillment_rate')
+
+
+def load_vendor_metrics(vendor_ids):
+    Vendor = apps.get_model('vendor_app', 'Vendor')
+    return {row.pop('id'): row for row in Vendor.objects.filter(id__in=vendor_ids).values('id', *METRIC_FIELDS)}
+
+
+class Subscription:
+    """
+    The metric updates pending for one client.
+
+    Updates may be pushed from any thread; they are handed to the event loop the subscription was
+    created on and read with `get()`.
+    """
+
+    def __init__(self, broker, vendor_ids):
+        self.broker = broker
+        self.vendor_ids = frozenset(vendor_ids)
+        self._loop = asyncio.get_running_loop()
+        self._pending = {}
+        self._ready = asyncio.Event()
+
+    def push(self, vendor_id, metrics):
+        self._loop.call_soon_threadsafe(self._deliver, vendor_id, metrics)
+
+    def _deliver(self, vendor_id, metrics):
+        self._pending[vendor_id] = metrics
+        self._ready.set()
+
+    async def get(self, timeout):
+        """
+        Wait up to `timeout` seconds for updates.
+
+        Returns:
+            dict: The latest pending metrics per vendor id, empty if none arrived in time.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        pending, self._pending = self._pending, {}
+        self._ready.clear()
+        return pending
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Broker delivering metric updates published in this process to the subscriptions of this process.
+
+    Only suitable when a single worker serves both writes and streams; see ChangeLogBroker otherwise.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, vendor_ids):
+        subscription = Subscription(self, vendor_ids)
+        with self._lock:
+            for vendor_id in subscription.vendor_ids:
+                self._subscriptions[vendor_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for vendor_id in subscription.vendor_ids:
+                self._subscriptions[vendor_id].discard(subscription)
+                if not self._subscriptions[vendor_id]:
+                    del self._subscriptions[vendor_id]
+
+    async def wait_ready(self):
+        """
+        Wait until updates made from now on are guaranteed to reach new subscriptions.
+        """
+
+    def wants(self, vendor_id):
+        return vendor_id in self._subscriptions
+
+    def publish(self, vendor_id, metrics):
+        self.deliver(vendor_id, metrics)
+
+    def deliver(self, vendor_id, metrics):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(vendor_id, ()))
+        for subscription in subscriptions:
+            subscription.push(vendor_id, metrics)
+
+
+class ChangeLogBroker(InProcessBroker):
+    """
+    Broker for deployments with several workers.
+
+    Local publishes are ignored; instead, while the process has subscriptions, a task polls the
+    change log (written by every worker) for updated vendors and delivers their current metrics.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.interval = getattr(settings, 'VENDOR_EVENTS_POLL_SECONDS', 1)
+        self._poller = None
+        self._ready = None
+
+    def subscribe(self, vendor_ids):
+        subscription = super().subscribe(vendor_ids)
+        if self._poller is None or self._poller.done():
+            self._ready = asyncio.Event()
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        return subscription
+
+    async def wait_ready(self):
+        # The poller only delivers changes logged after it read its starting cursor.
+        await self._ready.wait()
+
+    def wants(self, vendor_id):
+        # Updates reach the subscriptions through the change log, even those made in this process.
+        return False
+
+    async def _poll(self):
+        cursor = await sync_to_async(self._get_cursor)()
+        self._ready.set()
+        while True:
+            await asyncio.sleep(self.interval)
+            with self._lock:
+                vendor_ids = list(self._subscriptions)
+            if not vendor_ids:
+                break
+            cursor, updates = await sync_to_async(self._get_updates)(cursor, vendor_ids)
+            for vendor_id, metrics in updates.items():
+                self.deliver(vendor_id, metrics)
+
+    def _get_cursor(self):
+        ChangeLogEntry = apps.get_model('vendor_app', 'ChangeLogEntry')
+        return ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def _get_updates(self, cursor, vendor_ids):
+        ChangeLogEntry = apps.get_model('vendor_app', 'ChangeLogEntry')
+        # One row per changed subscribed vendor, read from the (model, object_id, id) index.
+        changed = dict(ChangeLogEntry.objects.filter(model='vendor', object_id__in=vendor_ids, id__gt=cursor)
+                       .values('object_id').annotate(last_id=Max('id')).order_by()
+                       .values_list('object_id', 'last_id'))
+        if not changed:
+            return cursor, {}
+        return max(changed.values()), load_vendor_metrics(changed)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(getattr(settings, 'VENDOR_EVENTS_BROKER', 'vendor_app.events.InProcessBroker'))()
+        return _broker
+
+
+def publish_vendor_metrics(vendor_id, metrics=None):
+    """
+    Publish the current metrics of a vendor, if anyone in this process is subscribed to it.
+
+    Args:
+    - vendor_id (int): The vendor whose metrics changed.
+    - metrics (dict): The new metrics; loaded from the database when omitted.
+    """
+    broker = get_broker()
+    if not broker.wants(vendor_id):
+        return
+    if metrics is None:
+        metrics = load_vendor_metrics([vendor_id]).get(vendor_id)
+        if metrics is None:
+            return
+    broker.publish(vendor_id, metrics)
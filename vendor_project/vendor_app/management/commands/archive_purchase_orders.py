@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from vendor_app.archive import archive_purchase_orders, get_archive_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Move closed purchase orders older than the configured age into the archive table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Archive closed purchase orders not updated for this many days '
+                                 '(default: PURCHASE_ORDER_ARCHIVE_AFTER_DAYS).')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of purchase orders archived per transaction.')
+
+    def handle(self, *args, **options):
+        cutoff = get_archive_cutoff(options['days'])
+        archived = archive_purchase_orders(cutoff, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS('Archived %d purchase orders updated before %s.' % (archived, cutoff)))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from vendor_app.backfill import backfill_historical_performance, get_backfill_until
+
+
+class Command(BaseCommand):
+    help = 'Rebuild HistoricalPerformance snapshots from purchase order history in a single pass.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', default=None,
+                            help='Write snapshots before this ISO 8601 time (default: the earliest snapshot '
+                                 'saved by the application, or now if there is none).')
+        parser.add_argument('--period-days', type=int, default=7,
+                            help='Days between snapshots; weekly snapshots are taken on Mondays.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of snapshots inserted per statement.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Number of purchase orders fetched per database round trip.')
+
+    def handle(self, *args, **options):
+        if options['until']:
+            until = parse_datetime(options['until'])
+            if until is None:
+                raise CommandError('--until must be an ISO 8601 date and time.')
+            if timezone.is_naive(until):
+                until = timezone.make_aware(until)
+        else:
+            until = get_backfill_until()
+
+        written = backfill_historical_performance(until, period_days=options['period_days'],
+                                                  batch_size=options['batch_size'],
+                                                  chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS('Wrote %d snapshots before %s.' % (written, until)))
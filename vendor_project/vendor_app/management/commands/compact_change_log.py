@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from vendor_app.models import ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = 'Remove change log entries superseded by a later change of the same object.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Only compact entries older than this many days '
+                                 '(default: CHANGE_LOG_RETENTION_DAYS).')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of entries deleted per statement.')
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = getattr(settings, 'CHANGE_LOG_RETENTION_DAYS', 30)
+        cutoff = timezone.now() - timedelta(days=days)
+
+        deleted = ChangeLogEntry.compact(cutoff, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS('Deleted %d superseded change log entries before %s.' % (deleted, cutoff)))
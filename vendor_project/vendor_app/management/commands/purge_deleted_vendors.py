@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from vendor_app.deletion import process_pending_deletions
+
+
+class Command(BaseCommand):
+    help = 'Purge vendors marked deleted, and their dependent rows, in bounded batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Maximum number of rows deleted per statement.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and poll for new deletions.')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            for deletion in process_pending_deletions(batch_size=options['batch_size']):
+                if deletion.status == 'completed':
+                    self.stdout.write(self.style.SUCCESS('Purged vendor %s (%d rows).' % (
+                        deletion.vendor_code, deletion.deleted_rows)))
+                else:
+                    self.stderr.write('Purging vendor %s failed: %s' % (deletion.vendor_code, deletion.error))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from vendor_app.recompute import get_shards, load_checkpoint, recompute_shard, save_checkpoint
+
+
+def init_worker():
+    # Forked workers must not share the parent's connections; each opens its own on first use.
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored metrics of every vendor, in parallel over vendor id ranges.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Number of worker processes (default: number of CPUs).')
+        parser.add_argument('--shard-size', type=int, default=1000,
+                            help='Number of vendor ids per shard.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of vendors per bulk_update statement.')
+        parser.add_argument('--checkpoint', default=None,
+                            help='File recording the finished shards; an interrupted run restarted with the same '
+                                 'file skips them.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report the metrics that differ from the stored values without writing them.')
+
+    def handle(self, *args, **options):
+        shard_size = options['shard_size']
+        checkpoint = options['checkpoint'] if not options['dry_run'] else None
+        done = load_checkpoint(checkpoint, shard_size) if checkpoint else set()
+        shards = [shard for shard in get_shards(shard_size) if shard[0] not in done]
+        if done:
+            self.stdout.write('Skipping %d shards finished by a previous run.' % len(done))
+
+        checked = changed = 0
+        for start, count, differences in self.run_shards(shards, options):
+            checked += count
+            changed += len({vendor_id for vendor_id, *_ in differences})
+            if options['dry_run']:
+                for vendor_id, field, stored, computed in differences:
+                    self.stdout.write('vendor %d: %s %r -> %r' % (vendor_id, field, stored, computed))
+            elif checkpoint:
+                done.add(start)
+                save_checkpoint(checkpoint, shard_size, done)
+
+        verb = 'would change' if options['dry_run'] else 'changed'
+        self.stdout.write(self.style.SUCCESS('Checked %d vendors in %d shards, %s %d.' % (
+            checked, len(shards), verb, changed)))
+
+    def run_shards(self, shards, options):
+        kwargs = {'dry_run': options['dry_run'], 'batch_size': options['batch_size']}
+        if options['workers'] <= 1:
+            for start, end in shards:
+                yield recompute_shard(start, end, **kwargs)
+            return
+
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as pool:
+            futures = [pool.submit(recompute_shard, start, end, **kwargs) for start, end in shards]
+            for future in as_completed(futures):
+                yield future.result()
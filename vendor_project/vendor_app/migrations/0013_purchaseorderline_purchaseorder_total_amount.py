@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_lines(apps, schema_editor):
+    PurchaseOrder = apps.get_model('vendor_app', 'PurchaseOrder')
+    PurchaseOrderLine = apps.get_model('vendor_app', 'PurchaseOrderLine')
+
+    for purchase_order in PurchaseOrder.objects.only('id', 'vendor_id', 'items').iterator(chunk_size=2000):
+        items = purchase_order.items if isinstance(purchase_order.items, list) else []
+        lines = [
+            PurchaseOrderLine(purchase_order_id=purchase_order.id, vendor_id=purchase_order.vendor_id,
+                              item_name=item['item_name'], price=float(item.get('price') or 0),
+                              quantity=int(item.get('quantity', 1)))
+            for item in items
+            if isinstance(item, dict) and item.get('item_name')
+        ]
+        PurchaseOrderLine.objects.bulk_create(lines)
+        PurchaseOrder.objects.filter(id=purchase_order.id).update(
+            total_amount=sum(line.price * line.quantity for line in lines))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0012_alter_purchaseorder_quality_rating_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='total_amount',
+            field=models.FloatField(default=0),
+        ),
+        migrations.CreateModel(
+            name='PurchaseOrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_name', models.CharField(max_length=255)),
+                ('price', models.FloatField()),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('purchase_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='vendor_app.purchaseorder')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='purchase_order_lines', to='vendor_app.vendor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item_name'], name='vendor_app__item_na_dcfa98_idx'), models.Index(fields=['vendor', 'item_name'], name='vendor_app__vendor__7cd538_idx')],
+            },
+        ),
+        migrations.RunPython(populate_lines, migrations.RunPython.noop),
+    ]
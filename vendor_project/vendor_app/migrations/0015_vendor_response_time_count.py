@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:49
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F
+
+
+def populate_response_time_count(apps, schema_editor):
+    PurchaseOrder = apps.get_model('vendor_app', 'PurchaseOrder')
+    Vendor = apps.get_model('vendor_app', 'Vendor')
+
+    # The stored average_response_time was never kept up to date, so it is recomputed along with the
+    # count: both are the base of the running mean maintained from now on.
+    Vendor.objects.update(average_response_time=0, response_time_count=0)
+    response_times = PurchaseOrder.objects.filter(acknowledgment_date__isnull=False).values('vendor_id').annotate(
+        average=Avg(ExpressionWrapper(F('acknowledgment_date') - F('issue_date'), output_field=DurationField())),
+        count=Count('id'),
+    )
+    for row in response_times:
+        Vendor.objects.filter(id=row['vendor_id']).update(
+            average_response_time=row['average'].total_seconds() / 60,  # in minutes
+            response_time_count=row['count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0014_purchaseorder_updated_at_purchaseorder_version_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='response_time_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_response_time_count, migrations.RunPython.noop),
+    ]
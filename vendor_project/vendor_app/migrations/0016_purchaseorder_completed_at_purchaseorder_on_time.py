@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:49
+
+from django.db import migrations, models
+
+
+def reset_on_time_delivery_rate(apps, schema_editor):
+    """
+    Reset the on-time delivery rate of every vendor.
+
+    The completion time of orders completed before this migration was never recorded, so whether they were on time
+    is unknown: their completed_at and on_time stay NULL and the rate only counts orders completed from now on.
+    Until a vendor has such orders its rate is 0, like that of a vendor without completed orders.
+    """
+    Vendor = apps.get_model('vendor_app', 'Vendor')
+    Vendor.objects.update(on_time_delivery_rate=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0015_vendor_response_time_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='on_time',
+            field=models.BooleanField(blank=True, default=None, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'status', 'on_time'], name='vendor_app__vendor__8832d3_idx'),
+        ),
+        migrations.RunPython(reset_on_time_delivery_rate, migrations.RunPython.noop),
+    ]
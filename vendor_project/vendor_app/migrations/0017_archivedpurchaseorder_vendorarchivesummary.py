@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0016_purchaseorder_completed_at_purchaseorder_on_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPurchaseOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('po_number', models.CharField(max_length=255, unique=True)),
+                ('order_date', models.DateTimeField()),
+                ('delivery_date', models.DateTimeField()),
+                ('items', models.JSONField()),
+                ('quantity', models.IntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'completed'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('quality_rating', models.FloatField(blank=True, null=True)),
+                ('issue_date', models.DateTimeField()),
+                ('acknowledgment_date', models.DateTimeField(blank=True, default=None, null=True)),
+                ('total_amount', models.FloatField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, default=None, null=True)),
+                ('on_time', models.BooleanField(blank=True, default=None, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VendorArchiveSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_pos', models.PositiveIntegerField(default=0)),
+                ('completed_pos', models.PositiveIntegerField(default=0)),
+                ('on_time_pos', models.PositiveIntegerField(default=0)),
+                ('rated_pos', models.PositiveIntegerField(default=0)),
+                ('quality_rating_sum', models.FloatField(default=0)),
+                ('acknowledged_pos', models.PositiveIntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0)),
+                ('total_amount_sum', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['status', 'updated_at'], name='vendor_app__status_0c9090_idx'),
+        ),
+        migrations.AddField(
+            model_name='vendorarchivesummary',
+            name='vendor',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive_summary', to='vendor_app.vendor'),
+        ),
+        migrations.AddField(
+            model_name='archivedpurchaseorder',
+            name='vendor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_purchase_orders', to='vendor_app.vendor'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0017_archivedpurchaseorder_vendorarchivesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vendor_id', models.BigIntegerField(db_index=True)),
+                ('vendor_code', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_rows', models.PositiveBigIntegerField(default=0)),
+                ('deleted_rows', models.PositiveBigIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, default=None, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+    ]
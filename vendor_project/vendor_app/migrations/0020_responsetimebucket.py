@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:03
+
+import math
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+# Frozen copy of QuantileSketch.get_index at the time of this migration (1% relative accuracy, values from one
+# second), so later changes to vendor_app.sketches cannot alter what this migration writes.
+LOG_GAMMA = math.log(1.01 / 0.99)
+MIN_VALUE = 1 / 60
+
+
+def get_index(value):
+    return math.ceil(math.log(max(value, MIN_VALUE)) / LOG_GAMMA)
+
+
+def populate_response_time_buckets(apps, schema_editor):
+    PurchaseOrder = apps.get_model('vendor_app', 'PurchaseOrder')
+    ArchivedPurchaseOrder = apps.get_model('vendor_app', 'ArchivedPurchaseOrder')
+    ResponseTimeBucket = apps.get_model('vendor_app', 'ResponseTimeBucket')
+
+    counts = Counter()
+    for model in (PurchaseOrder, ArchivedPurchaseOrder):
+        acknowledged = model.objects.filter(acknowledgment_date__isnull=False).values_list(
+            'vendor_id', 'issue_date', 'acknowledgment_date')
+        for vendor_id, issue_date, acknowledgment_date in acknowledged.iterator(chunk_size=2000):
+            response_time = (acknowledgment_date - issue_date).total_seconds() / 60
+            period = timezone.localtime(acknowledgment_date).date().replace(day=1)
+            counts[vendor_id, period, get_index(response_time)] += 1
+
+    ResponseTimeBucket.objects.bulk_create(
+        (ResponseTimeBucket(vendor_id=vendor_id, period=period, index=index, count=count)
+         for (vendor_id, period, index), count in counts.items()),
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0019_changelogentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseTimeBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('index', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='vendor_app.vendor')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='responsetimebucket',
+            constraint=models.UniqueConstraint(fields=('vendor', 'period', 'index'), name='unique_response_time_bucket'),
+        ),
+        migrations.RunPython(populate_response_time_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0020_responsetimebucket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['order_date'], name='vendor_app__order_d_91223f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['delivery_date'], name='vendor_app__deliver_f338ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['issue_date'], name='vendor_app__issue_d_a5455e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['status', 'order_date'], name='vendor_app__status_966cc1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['status', 'delivery_date'], name='vendor_app__status_d78cb5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['status', 'issue_date'], name='vendor_app__status_f32eee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['status', 'quality_rating'], name='vendor_app__status_04af6e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'order_date'], name='vendor_app__vendor__1b4c2d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'delivery_date'], name='vendor_app__vendor__27929d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('acknowledgment_date__isnull', True)), fields=['issue_date'], name='po_unacknowledged_issue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('acknowledgment_date__isnull', False)), fields=['issue_date'], name='po_acknowledged_issue_idx'),
+        ),
+    ]
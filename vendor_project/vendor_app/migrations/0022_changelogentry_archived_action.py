@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0021_purchaseorder_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changelogentry',
+            name='action',
+            field=models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('archived', 'Archived')], max_length=10),
+        ),
+    ]
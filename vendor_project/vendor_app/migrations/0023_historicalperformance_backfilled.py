@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0022_changelogentry_archived_action'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalperformance',
+            name='backfilled',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
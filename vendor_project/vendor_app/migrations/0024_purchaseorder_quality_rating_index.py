@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0023_historicalperformance_backfilled'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['quality_rating'], name='vendor_app__quality_ab5a96_idx'),
+        ),
+    ]
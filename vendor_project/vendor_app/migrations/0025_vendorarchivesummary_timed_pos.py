@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:41
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_timed_pos(apps, schema_editor):
+    ArchivedPurchaseOrder = apps.get_model('vendor_app', 'ArchivedPurchaseOrder')
+    VendorArchiveSummary = apps.get_model('vendor_app', 'VendorArchiveSummary')
+
+    counts = ArchivedPurchaseOrder.objects.filter(status='completed').values('vendor_id').annotate(
+        timed_pos=Count('id', filter=Q(on_time__isnull=False))).order_by()
+    for row in counts:
+        VendorArchiveSummary.objects.filter(vendor_id=row['vendor_id']).update(timed_pos=row['timed_pos'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendor_app', '0024_purchaseorder_quality_rating_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendorarchivesummary',
+            name='timed_pos',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_timed_pos, migrations.RunPython.noop),
+    ]
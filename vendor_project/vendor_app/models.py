@@ -5,12 +5,32 @@ Vendor Performance Tracking System
 This module defines a Django application for tracking and calculating performance metrics for vendors and their purchase orders.
 
 Classes:
+- VersionConflictError: Raised when a versioned save finds that the row was modified concurrently.
+
+- VersionedModel: An abstract Django model tracking a row version and last modification time, used for conditional requests.
+
+- VendorManager: The default Vendor manager, hiding vendors that are marked deleted.
+
+- PurchaseOrderManager: The default PurchaseOrder manager, hiding the purchase orders of vendors that are marked deleted.
+
 - UniqueVendorCodeField: A custom CharField to ensure uniqueness of the vendor_code in the Vendor model.
 
 - Vendor: A Django model representing information about vendors, including name, contact details, address, and performance metrics such as on-time delivery rate, quality rating average, average response time, and fulfillment rate. It also provides methods to calculate these metrics.
 
 - PurchaseOrder: A Django model representing purchase orders made to vendors, including details such as the purchase order number, vendor, order date, delivery date, items, quantity, status, quality rating, issue date, and acknowledgment date. It includes a method to calculate the response time.
 
+- PurchaseOrderLine: A Django model holding the normalized line items of a purchase order, kept in sync with PurchaseOrder.items so that spend and item queries can run as indexed SQL aggregates.
+
+- ArchivedPurchaseOrder: A Django model holding closed purchase orders moved out of the PurchaseOrder table.
+
+- VendorArchiveSummary: A Django model holding the per-vendor metric contributions of archived purchase orders.
+
+- ResponseTimeBucket: A Django model holding the buckets of the per-vendor, per-month response time sketches used for percentiles.
+
+- VendorDeletion: A Django model tracking the background purge of a vendor marked deleted.
+
+- ChangeLogEntry: A Django model holding the append-only change log of vendors and purchase orders, read through the change feed.
+
 - HistoricalPerformance: A Django model to store historical performance metrics for vendors, including on-time delivery rate, quality rating average, average response time, and fulfillment rate.
 
 Note: This code assumes the existence of a Django project and database setup with appropriate configurations.
@@ -21,11 +41,21 @@ Usage:
 - Use the PurchaseOrder model to track purchase orders and calculate response times.
 - HistoricalPerformance model can be used to store historical performance metrics for vendors.
 """
-from django.db import models
+import logging
+
+from django.db import IntegrityError, models, transaction
 from django.core.exceptions import ValidationError
-from django.db.models import Sum, Avg
+from django.db.models import (
+    Sum, Avg, Count, Exists, F, OuterRef, Q, Value, ExpressionWrapper, BooleanField, DurationField, FloatField,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from .events import publish_vendor_metrics
+from .sketches import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
 class UniqueVendorCodeField(models.CharField):
     def validate(self, value, model_instance):
         """
@@ -41,11 +71,63 @@ class UniqueVendorCodeField(models.CharField):
         super().validate(value, model_instance)
 
         # Check for uniqueness of vendor_code
-        existing_vendor = model_instance.__class__.objects.filter(vendor_code=value).exclude(id=model_instance.id).first()
+        existing_vendor = model_instance.__class__._base_manager.filter(vendor_code=value).exclude(id=model_instance.id).first()
         if existing_vendor:
             raise ValidationError('A vendor with this vendor code already exists.')
 
-class Vendor(models.Model):
+class VersionConflictError(Exception):
+    """
+        Raised when a save with an expected version finds the row at a different version.
+        """
+
+
+class VersionedModel(models.Model):
+    """
+        Abstract model tracking the row version and last modification time.
+
+        Every save bumps the version, so (pk, version) identifies one state of the row and can be
+        used as a strong ETag. Passing `expected_version` to save() turns it into a compare-and-set:
+        the version is claimed with a conditional UPDATE and VersionConflictError is raised if the
+        row has moved on, so concurrent editors are detected without holding locks across requests.
+
+        Attributes:
+        - updated_at (DateTimeField): The time of the last save.
+        - version (int): The row version, incremented on every save.
+        """
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, expected_version=None, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'version', 'updated_at'}
+
+        with transaction.atomic():
+            if expected_version is not None:
+                claimed = type(self)._base_manager.filter(pk=self.pk, version=expected_version).update(
+                    version=expected_version + 1)
+                if not claimed:
+                    raise VersionConflictError('%s %s is no longer at version %s.' % (
+                        self._meta.verbose_name, self.pk, expected_version))
+                self.version = expected_version + 1
+            elif not self._state.adding:
+                self.version += 1
+
+            super().save(*args, **kwargs)
+
+
+class VendorManager(models.Manager):
+    """
+        Default Vendor manager, hiding vendors that are marked deleted and waiting to be purged.
+        """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class Vendor(VersionedModel):
     """
         Model representing information about vendors and their performance metrics.
 
@@ -58,13 +140,22 @@ class Vendor(models.Model):
         - quality_rating_avg (float): The average quality rating of the vendor.
         - average_response_time (float): The average response time of the vendor.
         - fulfillment_rate (float): The fulfillment rate of the vendor.
+        - response_time_count (int): The number of acknowledged purchase orders in average_response_time.
+        - deleted_at (DateTimeField): The time the vendor was marked deleted; its rows are purged in the background.
+        - updated_at, version: Row version tracking inherited from VersionedModel.
 
         Methods:
-        - calculate_metrics(): Update performance metrics based on purchase order data.
+        - calculate_metrics(metrics=None): Update the given (by default all) performance metrics based on purchase order data.
         - calculate_fulfillment_rate(): Calculate and update the fulfillment rate.
         - calculate_average_response_time(): Calculate and update the average response time.
         - calculate_quality_rating_avg(): Calculate and update the average quality rating.
         - calculate_on_time_delivery_rate(): Calculate and update the on-time delivery rate.
+        - calculate_total_spend(): Calculate the total amount of all purchase orders of the vendor.
+        - record_response_time(vendor_id, response_time): Fold one new response time into the stored average.
+        - get_archive_summary(): Return the metric contributions of the vendor's archived purchase orders.
+        - mark_deleted(): Hide the vendor and queue the purge of its rows.
+
+        All metrics include the contributions of archived purchase orders (see VendorArchiveSummary).
         """
     name = models.CharField(max_length=255)
     contact_details = models.TextField(max_length=255)
@@ -74,85 +165,154 @@ class Vendor(models.Model):
     quality_rating_avg = models.FloatField(default=0)
     average_response_time = models.FloatField(default=0)
     fulfillment_rate = models.FloatField(default=0)
+    response_time_count = models.PositiveIntegerField(default=0)
+    deleted_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    objects = VendorManager()
+    all_objects = models.Manager()
+
+    METRICS = ('on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfillment_rate')
+
+    def calculate_metrics(self, metrics=None):
+        if metrics is None:
+            metrics = self.METRICS
+
+        update_fields = list(metrics)
+        for metric in metrics:
+            setattr(self, metric, getattr(self, 'calculate_' + metric)())
+        if 'average_response_time' in metrics:
+            update_fields.append('response_time_count')
+        self.save(update_fields=update_fields)
+
+    @classmethod
+    def record_response_time(cls, vendor_id, response_time):
+        # Atomic running-mean update, so concurrent acknowledgments need neither a rescan nor a lock.
+        cls.objects.filter(id=vendor_id).update(
+            average_response_time=ExpressionWrapper(
+                (F('average_response_time') * F('response_time_count') + response_time)
+                / (F('response_time_count') + 1),
+                output_field=FloatField()),
+            response_time_count=F('response_time_count') + 1,
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+        ChangeLogEntry.record(cls, 'updated', [vendor_id])
+        transaction.on_commit(lambda: publish_vendor_metrics(vendor_id))
+
+    def mark_deleted(self):
+        """
+        Mark the vendor deleted and queue a VendorDeletion purging it and its dependent rows.
 
-    def calculate_metrics(self):
-        self.on_time_delivery_rate = self.calculate_on_time_delivery_rate()
-        self.quality_rating_avg = self.calculate_quality_rating_avg()
-        self.average_response_time = self.calculate_average_response_time()
-        self.fulfillment_rate = self.calculate_fulfillment_rate()
-        self.save()
+        `Vendor.objects` stops returning the vendor immediately; the rows themselves are removed in
+        bounded batches by the purge_deleted_vendors worker.
+
+        Returns:
+        - VendorDeletion: The queued deletion job.
+        """
+        with transaction.atomic():
+            self.deleted_at = timezone.now()
+            self.save(update_fields=['deleted_at'])
+            return VendorDeletion.objects.create(vendor_id=self.id, vendor_code=self.vendor_code)
+
+    def get_archive_summary(self):
+        """
+        Return the metric contributions of the vendor's archived purchase orders.
+
+        Vendors without archived purchase orders get an unsaved, all-zero summary.
+        """
+        return VendorArchiveSummary.objects.filter(vendor=self).first() or VendorArchiveSummary(vendor=self)
 
     def calculate_fulfillment_rate(self):
+        archive = self.get_archive_summary()
+
         completed_pos = PurchaseOrder.objects.filter(
             vendor=self,
             status='completed'
-        ).count()
+        ).count() + archive.completed_pos
 
         total_pos = PurchaseOrder.objects.filter(
             vendor=self
-        ).count()
+        ).count() + archive.total_pos
 
-        print("completed_pos:", completed_pos)
-        print("total_pos:", total_pos)
+        logger.debug('Vendor %s: completed_pos=%s total_pos=%s', self.pk, completed_pos, total_pos)
 
         if total_pos > 0:
-            fulfillment_rate = (completed_pos / total_pos) * 100  # Multiply by 100 for percentage
-            print("fulfillment_rate:", fulfillment_rate)
-            return fulfillment_rate
-        else:
-            print("Returning 0 for fulfillment_rate.")
-            return 0
+            return (completed_pos / total_pos) * 100  # Multiply by 100 for percentage
+        return 0
 
     def calculate_average_response_time(self):
-        response_times = []
-        acknowledged_pos = PurchaseOrder.objects.filter(
+        archive = self.get_archive_summary()
+
+        response_times = PurchaseOrder.objects.filter(
             vendor=self,
             acknowledgment_date__isnull=False
+        ).aggregate(
+            average=Avg(ExpressionWrapper(F('acknowledgment_date') - F('issue_date'), output_field=DurationField())),
+            count=Count('id'),
         )
 
-        for po in acknowledged_pos:
-            response_times.append(po.calculate_response_time())
-
-        if response_times:
-            return sum(response_times) / len(response_times)
+        self.response_time_count = response_times['count'] + archive.acknowledged_pos
+        if self.response_time_count:
+            total = archive.response_time_sum
+            if response_times['average'] is not None:
+                total += response_times['average'].total_seconds() / 60 * response_times['count']  # in minutes
+            return total / self.response_time_count
         return 0  # Default value if no response times are available
 
     def calculate_quality_rating_avg(self):
+        archive = self.get_archive_summary()
+
         completed_pos_with_rating = PurchaseOrder.objects.filter(
             vendor=self,
             status='completed',
             quality_rating__isnull=False
         )
 
-        total_ratings = completed_pos_with_rating.aggregate(Avg('quality_rating'))['quality_rating__avg']
+        ratings = completed_pos_with_rating.aggregate(total=Sum('quality_rating'), count=Count('id'))
+        total_ratings = (ratings['total'] or 0) + archive.quality_rating_sum
+        rated_pos = ratings['count'] + archive.rated_pos
 
-        if total_ratings is not None:
-            return total_ratings
+        if rated_pos:
+            return total_ratings / rated_pos
         return 0  # Default value if no ratings are available
 
     def calculate_on_time_delivery_rate(self):
-        completed_pos = PurchaseOrder.objects.filter(
+        archive = self.get_archive_summary()
+
+        # Both counts come from one pass over the (vendor, status, on_time) index. Orders completed before
+        # completion times were recorded have an unknown on_time and are left out.
+        counts = PurchaseOrder.objects.filter(
             vendor=self,
             status='completed'
-        ).count()
+        ).aggregate(
+            timed_pos=Count('id', filter=Q(on_time__isnull=False)),
+            on_time_pos=Count('id', filter=Q(on_time=True)),
+        )
+        timed_pos = counts['timed_pos'] + archive.timed_pos
+        on_time_pos = counts['on_time_pos'] + archive.on_time_pos
 
-        total_pos = PurchaseOrder.objects.filter(
-            vendor=self
-        ).count()
+        logger.debug('Vendor %s: timed_pos=%s on_time_pos=%s', self.pk, timed_pos, on_time_pos)
 
-        print("completed_pos:", completed_pos)
-        print("total_pos:", total_pos)
+        if timed_pos > 0:
+            return (on_time_pos / timed_pos) * 100  # Multiply by 100 for percentage
+        return 0
 
-        if total_pos > 0:
-            on_time_delivery_rate = (completed_pos / total_pos) * 100  # Multiply by 100 for percentage
-            print("on_time_delivery_rate:", on_time_delivery_rate)
-            return on_time_delivery_rate
-        else:
-            print("Returning 0 for on_time_delivery_rate.")
-            return 0
+    def calculate_total_spend(self):
+        total_spend = PurchaseOrder.objects.filter(vendor=self).aggregate(Sum('total_amount'))['total_amount__sum']
+
+        return (total_spend or 0) + self.get_archive_summary().total_amount_sum
 
 
-class PurchaseOrder(models.Model):
+class PurchaseOrderManager(models.Manager):
+    """
+        Default PurchaseOrder manager, hiding the purchase orders of vendors that are marked deleted and waiting to be
+        purged.
+        """
+    def get_queryset(self):
+        return super().get_queryset().filter(vendor__deleted_at__isnull=True)
+
+
+class PurchaseOrder(VersionedModel):
     """
      Model representing purchase orders made to vendors.
 
@@ -167,9 +327,24 @@ class PurchaseOrder(models.Model):
      - quality_rating (float): The quality rating assigned to the purchase order.
      - issue_date (DateTimeField): The date when the purchase order was issued.
      - acknowledgment_date (DateTimeField): The date when the purchase order was acknowledged.
+     - total_amount (float): Denormalized sum of price * quantity over the items, maintained on save.
+     - completed_at (DateTimeField): The time the purchase order transitioned to completed.
+     - on_time (bool): Whether the purchase order was completed by its delivery date; null until completed.
+     - updated_at, version: Row version tracking inherited from VersionedModel.
+
+     The purchase orders of vendors marked deleted are hidden from `PurchaseOrder.objects` until they are purged;
+     `all_objects` still returns them.
 
      Methods:
+     - get_affected_metrics(update_fields): Return the vendor metrics that depend on the given fields.
+     - can_transition(from_status, to_status): Check whether a status transition is allowed.
+     - acknowledge(po_id, acknowledgment_date): Atomically acknowledge a purchase order that is not acknowledged yet.
+     - get_completion_updates(now): Return the queryset.update() values that mark purchase orders completed.
+     - set_completion(): Maintain completed_at and on_time from the status and delivery date.
      - calculate_response_time(): Calculate the response time for the purchase order.
+     - get_response_sample(): Return the response time sketch entry of the purchase order.
+     - calculate_total_amount(): Calculate the total amount of the items.
+     - sync_lines(): Replace the PurchaseOrderLine rows of the purchase order with the current items.
      """
     po_number = models.CharField(unique=True, max_length=255)
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='purchase_orders', db_index=True)
@@ -186,12 +361,487 @@ class PurchaseOrder(models.Model):
     quality_rating = models.FloatField(null=True, blank=True)
     issue_date = models.DateTimeField()
     acknowledgment_date = models.DateTimeField(null=True, blank=True, default=None)
+    total_amount = models.FloatField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True, default=None)
+    on_time = models.BooleanField(null=True, blank=True, default=None)
+
+    objects = PurchaseOrderManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor', 'status', 'on_time']),
+            models.Index(fields=['status', 'updated_at']),
+            # Access paths of the list endpoint, see LIST_INDEX_PATHS.
+            models.Index(fields=['order_date']),
+            models.Index(fields=['delivery_date']),
+            models.Index(fields=['issue_date']),
+            models.Index(fields=['quality_rating']),
+            models.Index(fields=['status', 'order_date']),
+            models.Index(fields=['status', 'delivery_date']),
+            models.Index(fields=['status', 'issue_date']),
+            models.Index(fields=['status', 'quality_rating']),
+            models.Index(fields=['vendor', 'order_date']),
+            models.Index(fields=['vendor', 'delivery_date']),
+            models.Index(fields=['issue_date'], condition=Q(acknowledgment_date__isnull=True),
+                         name='po_unacknowledged_issue_idx'),
+            models.Index(fields=['issue_date'], condition=Q(acknowledgment_date__isnull=False),
+                         name='po_acknowledged_issue_idx'),
+        ]
+
+    CLOSED_STATUSES = ('completed', 'cancelled')
+
+    # Equality filters accepted together by the list endpoint, mapped to the fields an index lets them be
+    # range-filtered and ordered by. Every accepted request is a single range scan of one of the indexes above.
+    LIST_INDEX_PATHS = {
+        (): ('order_date', 'delivery_date', 'issue_date', 'quality_rating'),
+        ('status',): ('order_date', 'delivery_date', 'issue_date', 'quality_rating'),
+        ('vendor_id',): ('order_date', 'delivery_date'),
+        ('acknowledged',): ('issue_date',),
+        ('status', 'vendor_id'): (),
+    }
+
+    # Statuses each status may move to; completed and cancelled orders are closed.
+    STATUS_TRANSITIONS = {
+        'pending': ('pending', 'delivered', 'completed', 'cancelled'),
+        'delivered': ('delivered', 'completed', 'cancelled'),
+        'completed': ('completed',),
+        'cancelled': ('cancelled',),
+    }
+
+    # Vendor metrics that depend on each purchase order field; fields not listed affect no metric.
+    METRIC_DEPENDENCIES = {
+        'vendor': Vendor.METRICS,
+        'status': ('on_time_delivery_rate', 'quality_rating_avg', 'fulfillment_rate'),
+        'delivery_date': ('on_time_delivery_rate',),
+        'quality_rating': ('quality_rating_avg',),
+        'issue_date': ('average_response_time',),
+        'acknowledgment_date': ('average_response_time',),
+    }
+
+    @classmethod
+    def get_affected_metrics(cls, update_fields):
+        if update_fields is None:
+            return list(Vendor.METRICS)
+
+        affected = set()
+        for field in update_fields:
+            affected.update(cls.METRIC_DEPENDENCIES.get(field, ()))
+        return [metric for metric in Vendor.METRICS if metric in affected]
+
+    @classmethod
+    def acknowledge(cls, po_id, acknowledgment_date):
+        """
+        Set the acknowledgment date of a purchase order that has not been acknowledged yet.
+
+        The write is a single conditional UPDATE, so concurrent acknowledgments of the same order
+        cannot both succeed, and only the vendor's response time aggregate is updated.
+
+        Returns:
+        - bool: Whether the purchase order was acknowledged by this call.
+        """
+        with transaction.atomic():
+            acknowledged = cls.objects.filter(id=po_id, acknowledgment_date__isnull=True).update(
+                acknowledgment_date=acknowledgment_date, version=F('version') + 1, updated_at=timezone.now())
+            if not acknowledged:
+                return False
+            ChangeLogEntry.record(cls, 'updated', [po_id])
+
+            vendor_id, issue_date = cls.objects.filter(id=po_id).values_list('vendor_id', 'issue_date').get()
+            response_time = (acknowledgment_date - issue_date).total_seconds() / 60
+            Vendor.record_response_time(vendor_id, response_time)
+            ResponseTimeBucket.record(vendor_id, acknowledgment_date, response_time)
+        return True
+
+    @classmethod
+    def can_transition(cls, from_status, to_status):
+        return to_status in cls.STATUS_TRANSITIONS.get(from_status, ())
+
+    @classmethod
+    def get_completion_updates(cls, now):
+        """
+        Return the queryset.update() values that mark purchase orders as completed at `now`.
+
+        Orders that are already completed keep their completion time.
+        """
+        completed_at = Coalesce(F('completed_at'), Value(now))
+        return {
+            'completed_at': completed_at,
+            'on_time': ExpressionWrapper(Q(delivery_date__gte=completed_at), output_field=BooleanField()),
+        }
+
+    def set_completion(self):
+        if self.status == 'completed':
+            if self.completed_at is None:
+                self.completed_at = timezone.now()
+            self.on_time = self.completed_at <= self.delivery_date
+        else:
+            self.completed_at = None
+            self.on_time = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so that a save changing the response time can move it to its new sketch bucket.
+        if {'vendor_id', 'issue_date', 'acknowledgment_date'} <= set(field_names):
+            instance._loaded_response_sample = instance.get_response_sample()
+        # Remembered so that a save moving the order to another vendor can update the lines and the previous vendor.
+        if 'vendor_id' in field_names:
+            instance._loaded_vendor_id = instance.vendor_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        extra_fields = set()
+
+        items_changed = update_fields is None or 'items' in update_fields
+        if items_changed:
+            self.total_amount = self.calculate_total_amount()
+            extra_fields.add('total_amount')
+
+        if update_fields is None or {'status', 'delivery_date'} & set(update_fields):
+            self.set_completion()
+            extra_fields.update(('completed_at', 'on_time'))
+
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | extra_fields
+
+        # Read by the update_vendor_metrics signal, which recomputes the vendor the order was moved away from.
+        loaded_vendor_id = getattr(self, '_loaded_vendor_id', None)
+        self._previous_vendor_id = loaded_vendor_id if loaded_vendor_id != self.vendor_id else None
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if items_changed:
+                self.sync_lines()
+            elif self._previous_vendor_id is not None:
+                PurchaseOrderLine.objects.filter(purchase_order=self).update(vendor_id=self.vendor_id)
+            if update_fields is None or {'vendor', 'issue_date', 'acknowledgment_date'} & set(update_fields):
+                self.update_response_sample()
+        self._loaded_vendor_id = self.vendor_id
 
     def calculate_response_time(self):
         if self.acknowledgment_date:
             return (self.acknowledgment_date - self.issue_date).total_seconds() / 60  # in minutes
         return 0
 
+    def get_response_sample(self):
+        """
+        Return the (vendor_id, acknowledgment_date, response_time) entry of the purchase order in the response
+        time sketches, or None if it is not acknowledged.
+        """
+        if self.acknowledgment_date:
+            return self.vendor_id, self.acknowledgment_date, self.calculate_response_time()
+        return None
+
+    def update_response_sample(self):
+        # Deleting or archiving a purchase order keeps its entry: the sketches describe every acknowledgment made.
+        previous = getattr(self, '_loaded_response_sample', None)
+        current = self.get_response_sample()
+        if current != previous:
+            if previous is not None:
+                ResponseTimeBucket.record(*previous, count=-1)
+            if current is not None:
+                ResponseTimeBucket.record(*current)
+        self._loaded_response_sample = current
+
+    def get_line_items(self):
+        """
+        Return the items as (item_name, price, quantity) tuples.
+
+        Items without a quantity count once; entries that are not item objects are ignored.
+        """
+        if not isinstance(self.items, list):
+            return []
+
+        return [
+            (item['item_name'], float(item.get('price') or 0), int(item.get('quantity', 1)))
+            for item in self.items
+            if isinstance(item, dict) and item.get('item_name')
+        ]
+
+    def calculate_total_amount(self):
+        return sum(price * quantity for _, price, quantity in self.get_line_items())
+
+    def sync_lines(self):
+        PurchaseOrderLine.objects.filter(purchase_order=self).delete()
+        PurchaseOrderLine.objects.bulk_create([
+            PurchaseOrderLine(purchase_order=self, vendor_id=self.vendor_id,
+                              item_name=item_name, price=price, quantity=quantity)
+            for item_name, price, quantity in self.get_line_items()
+        ])
+
+
+class PurchaseOrderLine(models.Model):
+    """
+        Model representing a single line item of a purchase order.
+
+        Rows are derived from PurchaseOrder.items and rewritten whenever the items change.
+
+        Attributes:
+        - purchase_order (ForeignKey): Reference to the PurchaseOrder model.
+        - vendor (ForeignKey): Reference to the Vendor model, denormalized from the purchase order.
+        - item_name (str): The name of the item.
+        - price (float): The unit price of the item.
+        - quantity (int): The ordered quantity of the item.
+        """
+    purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name='lines')
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='purchase_order_lines')
+    item_name = models.CharField(max_length=255)
+    price = models.FloatField()
+    quantity = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item_name']),
+            models.Index(fields=['vendor', 'item_name']),
+        ]
+
+class ArchivedPurchaseOrder(models.Model):
+    """
+        Model representing a closed purchase order moved out of the PurchaseOrder table.
+
+        Rows keep the id and columns of the original purchase order, so they can be served alongside
+        live purchase orders. Their contribution to vendor metrics is kept in VendorArchiveSummary.
+
+        Attributes:
+        - The PurchaseOrder columns, except the version tracking.
+        - archived_at (DateTimeField): The time the purchase order was archived.
+        """
+    id = models.BigIntegerField(primary_key=True)
+    po_number = models.CharField(unique=True, max_length=255)
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='archived_purchase_orders')
+    order_date = models.DateTimeField()
+    delivery_date = models.DateTimeField()
+    items = models.JSONField()
+    quantity = models.IntegerField()
+    status = models.CharField(max_length=20, choices=PurchaseOrder._meta.get_field('status').choices)
+    quality_rating = models.FloatField(null=True, blank=True)
+    issue_date = models.DateTimeField()
+    acknowledgment_date = models.DateTimeField(null=True, blank=True, default=None)
+    total_amount = models.FloatField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True, default=None)
+    on_time = models.BooleanField(null=True, blank=True, default=None)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    # Columns copied from PurchaseOrder when archiving.
+    COPIED_FIELDS = ('id', 'po_number', 'vendor_id', 'order_date', 'delivery_date', 'items', 'quantity', 'status',
+                     'quality_rating', 'issue_date', 'acknowledgment_date', 'total_amount', 'completed_at', 'on_time')
+
+
+class VendorArchiveSummary(models.Model):
+    """
+        Model holding the aggregated metric contributions of a vendor's archived purchase orders.
+
+        Attributes:
+        - vendor (OneToOneField): Reference to the Vendor model.
+        - total_pos (int): The number of archived purchase orders.
+        - completed_pos (int): The number of archived completed purchase orders.
+        - timed_pos (int): The number of archived completed purchase orders whose on_time is known.
+        - on_time_pos (int): The number of archived purchase orders completed on time.
+        - rated_pos (int): The number of archived completed purchase orders with a quality rating.
+        - quality_rating_sum (float): The sum of those quality ratings.
+        - acknowledged_pos (int): The number of archived acknowledged purchase orders.
+        - response_time_sum (float): The sum of their response times, in minutes.
+        - total_amount_sum (float): The sum of the total amounts of the archived purchase orders.
+
+        Methods:
+        - add_purchase_orders(vendor_id, purchase_orders): Add the contributions of purchase orders being archived.
+        """
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, related_name='archive_summary')
+    total_pos = models.PositiveIntegerField(default=0)
+    completed_pos = models.PositiveIntegerField(default=0)
+    timed_pos = models.PositiveIntegerField(default=0)
+    on_time_pos = models.PositiveIntegerField(default=0)
+    rated_pos = models.PositiveIntegerField(default=0)
+    quality_rating_sum = models.FloatField(default=0)
+    acknowledged_pos = models.PositiveIntegerField(default=0)
+    response_time_sum = models.FloatField(default=0)
+    total_amount_sum = models.FloatField(default=0)
+
+    @classmethod
+    def add_purchase_orders(cls, vendor_id, purchase_orders):
+        contributions = dict.fromkeys(
+            ('total_pos', 'completed_pos', 'timed_pos', 'on_time_pos', 'rated_pos', 'quality_rating_sum',
+             'acknowledged_pos', 'response_time_sum', 'total_amount_sum'), 0)
+
+        for po in purchase_orders:
+            contributions['total_pos'] += 1
+            contributions['total_amount_sum'] += po.total_amount
+            if po.status == 'completed':
+                contributions['completed_pos'] += 1
+                contributions['timed_pos'] += po.on_time is not None
+                contributions['on_time_pos'] += bool(po.on_time)
+                if po.quality_rating is not None:
+                    contributions['rated_pos'] += 1
+                    contributions['quality_rating_sum'] += po.quality_rating
+            if po.acknowledgment_date:
+                contributions['acknowledged_pos'] += 1
+                contributions['response_time_sum'] += po.calculate_response_time()
+
+        cls.objects.get_or_create(vendor_id=vendor_id)
+        cls.objects.filter(vendor_id=vendor_id).update(
+            **{field: F(field) + value for field, value in contributions.items()})
+
+
+class ResponseTimeBucket(models.Model):
+    """
+        Model holding one bucket of a vendor's monthly response time sketch (see sketches.QuantileSketch).
+
+        Attributes:
+        - vendor (ForeignKey): Reference to the Vendor model.
+        - period (DateField): The first day of the month the acknowledgments were made in.
+        - index (int): The sketch bucket index of the response times.
+        - count (int): The number of acknowledgments with a response time in the bucket.
+
+        Methods:
+        - record(vendor_id, acknowledgment_date, response_time, count): Add (or with a negative count, remove)
+          response times to the sketch of a vendor.
+        - get_sketch(vendor_ids, since, until): Return the merged sketch of some vendors and months.
+        """
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
+    period = models.DateField()
+    index = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'period', 'index'], name='unique_response_time_bucket'),
+        ]
+
+    @staticmethod
+    def get_period(acknowledgment_date):
+        return timezone.localtime(acknowledgment_date).date().replace(day=1)
+
+    @classmethod
+    def record(cls, vendor_id, acknowledgment_date, response_time, count=1):
+        key = {'vendor_id': vendor_id, 'period': cls.get_period(acknowledgment_date),
+               'index': QuantileSketch.get_index(response_time)}
+        bucket = cls.objects.filter(**key)
+        if bucket.update(count=F('count') + count) or count < 0:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(count=count, **key)
+        except IntegrityError:
+            # Created concurrently; the row exists now.
+            bucket.update(count=F('count') + count)
+
+    @classmethod
+    def get_sketch(cls, vendor_ids=None, since=None, until=None):
+        """
+        Return the merged response time sketch of the given vendors and months.
+
+        Args:
+        - vendor_ids (list): The vendors to include; all vendors if None.
+        - since, until (date): The first and last month to include; unbounded if None.
+
+        Returns:
+        - QuantileSketch: The merged sketch.
+        """
+        buckets = cls.objects.all()
+        if vendor_ids is not None:
+            buckets = buckets.filter(vendor_id__in=vendor_ids)
+        if since is not None:
+            buckets = buckets.filter(period__gte=since)
+        if until is not None:
+            buckets = buckets.filter(period__lte=until)
+        return QuantileSketch(buckets.values_list('index').annotate(total=Sum('count')).order_by())
+
+
+class VendorDeletion(models.Model):
+    """
+        Model tracking the background purge of a vendor marked deleted.
+
+        Attributes:
+        - vendor_id (int): The id of the deleted vendor (not a foreign key, the vendor row is purged last).
+        - vendor_code (str): The vendor code of the deleted vendor.
+        - status (str): The status of the purge (pending, running, completed, failed).
+        - total_rows (int): The number of rows to purge, counted when the purge starts.
+        - deleted_rows (int): The number of rows purged so far.
+        - error (str): The error that stopped a failed purge.
+        - created_at (DateTimeField): The time the vendor was marked deleted.
+        - finished_at (DateTimeField): The time the purge completed.
+        """
+    vendor_id = models.BigIntegerField(db_index=True)
+    vendor_code = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, default='pending', choices=[
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ])
+    total_rows = models.PositiveBigIntegerField(default=0)
+    deleted_rows = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True, default=None)
+
+
+class ChangeLogEntry(models.Model):
+    """
+        Model representing one entry of the append-only change log of vendors and purchase orders.
+
+        The auto-incrementing id is the cursor of the change feed: a consumer that has seen every entry up to an id
+        only needs the entries after it.
+
+        Attributes:
+        - model (str): The model_name of the changed model (vendor or purchaseorder).
+        - object_id (int): The id of the changed object.
+        - action (str): The kind of change (created, updated, deleted, or archived for purchase orders moved to
+          ArchivedPurchaseOrder).
+        - version (int): The row version after the change, if known.
+        - changed_at (DateTimeField): The time the change was recorded.
+
+        Methods:
+        - record(model, action, object_ids, version=None): Append entries for changed objects.
+        - compact(cutoff, chunk_size=1000): Delete old entries superseded by a later entry for the same object.
+        """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=[
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+        ('archived', 'Archived'),
+    ])
+    version = models.PositiveIntegerField(null=True, blank=True, default=None)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'object_id', 'id']),
+        ]
+
+    @classmethod
+    def record(cls, model, action, object_ids, version=None):
+        cls.objects.bulk_create([
+            cls(model=model._meta.model_name, object_id=object_id, action=action, version=version)
+            for object_id in object_ids
+        ])
+
+    @classmethod
+    def compact(cls, cutoff, chunk_size=1000):
+        """
+        Delete entries recorded before `cutoff` that are superseded by a later entry for the same object.
+
+        The latest entry of every object is kept, so a consumer resuming from any cursor still ends up
+        with the current state of every object it missed.
+
+        Returns:
+        - int: The number of deleted entries.
+        """
+        superseded = cls.objects.filter(changed_at__lt=cutoff).filter(Exists(cls.objects.filter(
+            model=OuterRef('model'), object_id=OuterRef('object_id'), id__gt=OuterRef('id'))))
+
+        deleted = 0
+        while True:
+            ids = list(superseded.order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            deleted += cls.objects.filter(id__in=ids).delete()[0]
+
+
 class HistoricalPerformance(models.Model):
     """
         Model representing historical performance metrics for vendors.
@@ -203,6 +853,7 @@ class HistoricalPerformance(models.Model):
         - quality_rating_avg (float): The average quality rating for the specified date.
         - average_response_time (float): The average response time for the specified date.
         - fulfillment_rate (float): The fulfillment rate for the specified date.
+        - backfilled (bool): Whether the snapshot was rebuilt from purchase order history by the backfill.
         """
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
     date = models.DateTimeField()
@@ -210,3 +861,4 @@ class HistoricalPerformance(models.Model):
     quality_rating_avg = models.FloatField()
     average_response_time = models.FloatField()
     fulfillment_rate = models.FloatField()
+    backfilled = models.BooleanField(default=False, editable=False)
@@ -0,0 +1,185 @@
+"""
+On-demand Request Profiling
+
+This module provides a middleware that profiles individual requests when asked to, for example to find out where the
+time of a slow /api/vendors/<id>/performance/ call goes in staging.
+
+Classes:
+- StackSampler: A sampling profiler recording the stacks of one thread in collapsed-stack (flamegraph) format.
+- RequestProfilingMiddleware: Middleware running flagged requests of staff users under cProfile and StackSampler.
+
+Usage:
+- Add 'vendor_app.profiling.RequestProfilingMiddleware' to MIDDLEWARE.
+- Send a request with the `X-Profile: 1` header or the `profile=1` query parameter (`true` and `yes` work too; any
+  other value leaves profiling off) and a staff user's token.
+- The pstats dump, the collapsed stacks and the executed SQL are stored in REQUEST_PROFILE_DIR under the id returned
+  in the `X-Profile-Id` response header. With `X-Profile: inline` (or `profile=inline`) they are returned as JSON
+  instead of the normal response body.
+
+Requests without the flag only pay for one header and one query string lookup.
+"""
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+
+class StackSampler:
+    """
+    Sampling profiler for a single thread.
+
+    A background thread records the stack of the target thread every `interval` seconds; the samples are reported in
+    the collapsed-stack format read by flamegraph.pl and speedscope (`root;caller;callee count`).
+    """
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('%s (%s:%d)' % (code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join('%s %d\n' % (stack, count) for stack, count in self.samples.most_common())
+
+
+class RequestProfilingMiddleware:
+    """
+    Middleware profiling requests flagged with `X-Profile` or `?profile=`, for staff tokens only.
+
+    It supports both WSGI and ASGI. Under ASGI, unflagged requests are passed on without any sync adaptation; a
+    flagged request is profiled on a worker thread, on which the synchronous views it reaches through async_to_sync
+    also run, so their Python and SQL work shows up in the profile.
+    """
+    sync_capable = True
+    async_capable = True
+    header = 'HTTP_X_PROFILE'
+    query_param = 'profile'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        mode = self.get_mode(request)
+        if not mode or not self.is_staff(request):
+            return self.get_response(request)
+        return self.profile(request, mode)
+
+    async def __acall__(self, request):
+        mode = self.get_mode(request)
+        if not mode or not await sync_to_async(self.is_staff)(request):
+            return await self.get_response(request)
+        return await sync_to_async(self.profile)(request, mode)
+
+    def get_mode(self, request):
+        # Flags are parsed like the API's boolean query parameters; '0', 'false', 'off' and the like leave it off.
+        mode = request.META.get(self.header)
+        if mode is None and self.query_param + '=' in request.META.get('QUERY_STRING', ''):
+            mode = request.GET.get(self.query_param)
+        if mode is None:
+            return None
+        mode = mode.strip().lower()
+        if mode == 'inline':
+            return mode
+        return 'file' if mode in ('1', 'true', 'yes') else None
+
+    def is_staff(self, request):
+        try:
+            user_auth = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return user_auth is not None and user_auth[0].is_staff
+
+    def profile(self, request, mode):
+        queries = []
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'params': repr(params),
+                    'duration_ms': (time.perf_counter() - start) * 1000,
+                })
+
+        get_response = async_to_sync(self.get_response) if self.async_mode else self.get_response
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident())
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            sampler.start()
+            profiler.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+                sampler.stop()
+
+        stats = pstats.Stats(profiler)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(50)
+
+        if mode == 'inline':
+            return JsonResponse({
+                'status_code': response.status_code,
+                'pstats': report.getvalue(),
+                'collapsed': sampler.collapsed(),
+                'queries': queries,
+            })
+
+        profile_id = uuid.uuid4().hex
+        profile_dir = Path(getattr(settings, 'REQUEST_PROFILE_DIR', Path(settings.BASE_DIR) / 'profiles'))
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(profile_dir / ('%s.pstats' % profile_id))
+        (profile_dir / ('%s.collapsed' % profile_id)).write_text(sampler.collapsed())
+        (profile_dir / ('%s.sql.json' % profile_id)).write_text(json.dumps({
+            'method': request.method,
+            'path': request.get_full_path(),
+            'queries': queries,
+        }, indent=2))
+
+        response['X-Profile-Id'] = profile_id
+        response['X-Profile-Queries'] = str(len(queries))
+        response['X-Profile-SQL-Time-Ms'] = '%.3f' % sum(query['duration_ms'] for query in queries)
+        return response
@@ -0,0 +1,166 @@
+"""
+Bulk Recomputation of Vendor Metrics
+
+After data corrections the stored vendor metrics have to be recomputed for every vendor. Calling
+Vendor.calculate_metrics() in a loop costs around ten queries and one write per vendor; this module instead computes
+the metrics of a whole range of vendor ids with one aggregate query over the purchase orders, and writes the vendors
+whose values changed with bulk_update. The ranges (shards) are independent, so they can be processed by separate
+processes in parallel.
+
+Functions:
+- get_shards: Split the vendor id space into id ranges.
+- compute_shard_metrics: Compute the metrics of the vendors in an id range, the same way Vendor.calculate_metrics does.
+- recompute_shard: Recompute the metrics of the vendors in an id range and store the ones that changed.
+- load_checkpoint / save_checkpoint: Read and write the set of shards already processed by an interrupted run.
+"""
+import json
+import math
+import os
+
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Min, Q, Sum
+from django.utils import timezone
+
+from .events import publish_vendor_metrics
+from .models import ChangeLogEntry, PurchaseOrder, Vendor, VendorArchiveSummary
+
+METRIC_FIELDS = Vendor.METRICS + ('response_time_count',)
+COUNTERS = ('total_pos', 'completed_pos', 'timed_pos', 'on_time_pos', 'rated_pos', 'quality_rating_sum',
+            'acknowledged_pos', 'response_time_sum')
+
+
+def get_shards(shard_size):
+    """
+    Split the vendor id space into consecutive `[start, end)` ranges of `shard_size` ids.
+
+    Returns:
+    - list: The (start, end) pairs; empty without vendors.
+    """
+    bounds = Vendor.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return []
+    first = bounds['first'] - bounds['first'] % shard_size
+    return [(start, start + shard_size) for start in range(first, bounds['last'] + 1, shard_size)]
+
+
+def compute_shard_metrics(start, end):
+    """
+    Compute the metrics of the vendors with ids in `[start, end)`.
+
+    Live purchase orders are aggregated per vendor in a single query and combined with the vendors' archive
+    summaries, applying the formulas of the Vendor.calculate_* methods.
+
+    Returns:
+    - dict: Maps vendor ids to a dict of METRIC_FIELDS values.
+    """
+    completed = Q(status='completed')
+    acknowledged = Q(acknowledgment_date__isnull=False)
+    rated = completed & Q(quality_rating__isnull=False)
+    rows = PurchaseOrder.objects.filter(vendor_id__gte=start, vendor_id__lt=end).values('vendor_id').annotate(
+        total_pos=Count('id'),
+        completed_pos=Count('id', filter=completed),
+        timed_pos=Count('id', filter=completed & Q(on_time__isnull=False)),
+        on_time_pos=Count('id', filter=completed & Q(on_time=True)),
+        rated_pos=Count('id', filter=rated),
+        quality_rating_sum=Sum('quality_rating', filter=rated),
+        acknowledged_pos=Count('id', filter=acknowledged),
+        response_time_avg=Avg(ExpressionWrapper(F('acknowledgment_date') - F('issue_date'),
+                                                output_field=DurationField()), filter=acknowledged),
+    ).order_by()
+
+    totals = {vendor_id: dict.fromkeys(COUNTERS, 0)
+              for vendor_id in Vendor.objects.filter(id__gte=start, id__lt=end).values_list('id', flat=True)}
+    for row in rows:
+        counters = totals.get(row['vendor_id'])
+        if counters is None:
+            continue
+        for name in COUNTERS[:-1]:
+            counters[name] += row[name] or 0
+        if row['response_time_avg'] is not None:
+            counters['response_time_sum'] += row['response_time_avg'].total_seconds() / 60 * row['acknowledged_pos']
+    for summary in VendorArchiveSummary.objects.filter(vendor_id__gte=start, vendor_id__lt=end):
+        counters = totals.get(summary.vendor_id)
+        if counters is not None:
+            for name in COUNTERS:
+                counters[name] += getattr(summary, name)
+
+    return {vendor_id: {
+        'on_time_delivery_rate': c['on_time_pos'] / c['timed_pos'] * 100 if c['timed_pos'] else 0,
+        'quality_rating_avg': c['quality_rating_sum'] / c['rated_pos'] if c['rated_pos'] else 0,
+        'average_response_time': c['response_time_sum'] / c['acknowledged_pos'] if c['acknowledged_pos'] else 0,
+        'fulfillment_rate': c['completed_pos'] / c['total_pos'] * 100 if c['total_pos'] else 0,
+        'response_time_count': c['acknowledged_pos'],
+    } for vendor_id, c in totals.items()}
+
+
+def recompute_shard(start, end, dry_run=False, batch_size=500):
+    """
+    Recompute the metrics of the vendors with ids in `[start, end)` and store those that changed.
+
+    The changed vendors are written with bulk_update in one transaction per shard, bumping their version and
+    recording them in the change log like any other vendor update. Like Vendor.calculate_metrics, the metrics are
+    computed outside that transaction.
+
+    Args:
+    - start, end (int): The vendor id range.
+    - dry_run (bool): Only report the differences, without writing.
+    - batch_size (int): Number of vendors per bulk_update statement.
+
+    Returns:
+    - tuple: (start, number of vendors checked, list of (vendor_id, field, stored, computed) differences).
+    """
+    computed = compute_shard_metrics(start, end)
+    changed = []
+    differences = []
+    for vendor in Vendor.objects.filter(id__in=list(computed)).only('id', *METRIC_FIELDS):
+        vendor_differences = [
+            (vendor.id, field, getattr(vendor, field), value)
+            for field, value in computed[vendor.id].items()
+            if not math.isclose(getattr(vendor, field), value, rel_tol=1e-9, abs_tol=1e-9)
+        ]
+        if vendor_differences:
+            differences.extend(vendor_differences)
+            changed.append(vendor)
+
+    if changed and not dry_run:
+        now = timezone.now()
+        for vendor in changed:
+            for field, value in computed[vendor.id].items():
+                setattr(vendor, field, value)
+            vendor.version = F('version') + 1
+            vendor.updated_at = now
+        changed_ids = [vendor.id for vendor in changed]
+        # The transaction only writes, so with SQLite concurrent shards queue for the write lock instead of
+        # deadlocking on upgrading their read locks.
+        with transaction.atomic():
+            Vendor.objects.bulk_update(changed, METRIC_FIELDS + ('version', 'updated_at'), batch_size=batch_size)
+            ChangeLogEntry.record(Vendor, 'updated', changed_ids)
+            transaction.on_commit(lambda: [publish_vendor_metrics(vendor_id) for vendor_id in changed_ids])
+
+    return start, len(computed), differences
+
+
+def load_checkpoint(path, shard_size):
+    """
+    Return the start ids of the shards recorded as done in the checkpoint file at `path`.
+
+    A missing checkpoint, or one written with a different shard size, yields an empty set.
+    """
+    try:
+        with open(path) as checkpoint:
+            data = json.load(checkpoint)
+    except FileNotFoundError:
+        return set()
+    if data.get('shard_size') != shard_size:
+        return set()
+    return set(data['done'])
+
+
+def save_checkpoint(path, shard_size, done):
+    """
+    Atomically record the start ids of the finished shards in the checkpoint file at `path`.
+    """
+    tmp_path = '%s.tmp' % path
+    with open(tmp_path, 'w') as checkpoint:
+        json.dump({'shard_size': shard_size, 'done': sorted(done)}, checkpoint)
+    os.replace(tmp_path, path)
@@ -3,7 +3,12 @@ Serializers for Django Models and Data Transformations
 
 This module contains serializers for Django models, data transformations, and utility functions.
 
+Functions:
+- save_changed_fields: Apply validated data to a model instance and save only the fields that changed.
+
 Classes:
+- DynamicFieldsMixin: Mixin allowing a serializer to be narrowed to a subset of its fields at construction time.
+
 - VendorSerializer: Serializer for the Vendor model, providing validation for the vendor_code field.
 
 - PurchaseOrderSerializer: Serializer for the PurchaseOrder model, including logic for creating and updating purchase orders and managing associated vendors.
@@ -12,8 +17,14 @@ Classes:
 
 - UpdateAcknowledgmentSerializer: Serializer for updating acknowledgment dates in purchase orders.
 
+- PurchaseOrderTransitionSerializer: Serializer for one entry of a batch purchase order status transition.
+
 - VendorPerformanceSerializer: Serializer for vendor performance metrics.
 
+- VendorDeletionSerializer: Serializer for the progress of a background vendor purge.
+
+- ChangeLogEntrySerializer: Serializer for change feed events.
+
 Usage:
 - Import these serializers into your Django project.
 - Use the serializers to transform Django model instances into JSON and vice versa.
@@ -21,11 +32,55 @@ Usage:
 
 Note: This code assumes the existence of a Django project and models (Vendor, PurchaseOrder, HistoricalPerformance) with appropriate configurations.
 """
-from .models import HistoricalPerformance, PurchaseOrder, Vendor
+from .models import ChangeLogEntry, HistoricalPerformance, PurchaseOrder, Vendor, VendorDeletion
+from .vendor_codes import get_vendor_id, vendor_code_cache
 from rest_framework import serializers
 from django.db import transaction
 
 
+def save_changed_fields(instance, validated_data, expected_version=None):
+    """
+    Apply validated data to an instance and write only the columns whose value changed.
+
+    Args:
+    - instance: The model instance being updated.
+    - validated_data (dict): The validated field values.
+    - expected_version (int): Optional row version the instance must still be at (see VersionedModel).
+
+    Returns:
+    - The updated instance.
+    """
+    changed_fields = []
+    for key, value in validated_data.items():
+        if getattr(instance, key) != value:
+            setattr(instance, key, value)
+            changed_fields.append(key)
+
+    if changed_fields or expected_version is not None:
+        instance.save(update_fields=changed_fields, expected_version=expected_version)
+
+    return instance
+
+
+class DynamicFieldsMixin:
+    """
+        Mixin for ModelSerializers that accept `fields` and `exclude` keyword arguments.
+
+        Fields that are not requested are dropped from the serializer before it is used, so they are
+        neither read from the instance nor rendered in the output.
+        """
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+        if exclude is not None:
+            for field_name in set(exclude):
+                self.fields.pop(field_name, None)
+
+
 class VendorSerializer(serializers.ModelSerializer):
     """
         Serializer for the Vendor model.
@@ -51,13 +106,18 @@ class VendorSerializer(serializers.ModelSerializer):
         if instance and instance.vendor_code == value:
             return value  # No change, so it's okay
 
-        existing_vendor = Vendor.objects.filter(vendor_code=value).first()
+        # Vendors waiting to be purged still hold their vendor code.
+        existing_vendor = Vendor.all_objects.filter(vendor_code=value).first()
         if existing_vendor:
             raise serializers.ValidationError({'vendor_code': 'Vendor with this vendor code already exists.'})
         return value
 
+    def update(self, instance, validated_data):
+        expected_version = validated_data.pop('expected_version', None)
+        return save_changed_fields(instance, validated_data, expected_version)
+
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
+class PurchaseOrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
         Serializer for the PurchaseOrder model.
 
@@ -73,11 +133,17 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
         - quality_rating: Quality rating assigned to the purchase order.
         - issue_date: Date when the purchase order was issued.
         - acknowledgment_date: Date when the purchase order was acknowledged.
+        - total_amount: Read-only total of price * quantity over the items.
+        - completed_at: Read-only time the purchase order was completed.
+        - on_time: Read-only flag whether the purchase order was completed by its delivery date.
+
+        Accepts `fields`/`exclude` keyword arguments to narrow the serialized fields (see DynamicFieldsMixin).
 
         Methods:
         - create: Create a new purchase order instance.
-        - update: Update an existing purchase order instance.
-        - _get_or_create_vendor: Get or create a vendor instance associated with the purchase order.
+        - update: Update an existing purchase order instance, writing only the changed fields.
+        - _lock_vendor: Lock the live vendor row for the write transaction, resolving the vendor code again if needed.
+        - _get_vendor_id: Resolve the vendor code to the id of the vendor, creating the vendor if needed.
         """
 
     vendor_code = serializers.CharField(write_only=True)
@@ -85,35 +151,61 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrder
         fields = ['id', 'po_number', 'vendor_code', 'order_date', 'delivery_date', 'items', 'quantity', 'status',
-                  'quality_rating', 'issue_date', 'acknowledgment_date']
+                  'quality_rating', 'issue_date', 'acknowledgment_date', 'total_amount', 'completed_at', 'on_time']
+        read_only_fields = ['total_amount', 'completed_at', 'on_time']
+
+    def validate_items(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError('Items must be a list of objects.')
+
+        for item in value:
+            if not isinstance(item, dict) or not item.get('item_name'):
+                raise serializers.ValidationError('Each item must be an object with an item_name.')
+            if not isinstance(item.get('price', 0), (int, float)) or isinstance(item.get('price'), bool):
+                raise serializers.ValidationError('Item price must be a number.')
+            quantity = item.get('quantity', 1)
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 0:
+                raise serializers.ValidationError('Item quantity must be a non-negative integer.')
+        return value
 
     def create(self, validated_data):
         vendor_code = validated_data.pop('vendor_code')
-        vendor_instance = self._get_or_create_vendor(vendor_code)
-
+        vendor_id = self._get_vendor_id(vendor_code)
         with transaction.atomic():
-            validated_data['vendor'] = vendor_instance
-            purchase_order_instance = PurchaseOrder.objects.create(**validated_data)
-
-        return purchase_order_instance
+            validated_data['vendor_id'] = self._lock_vendor(vendor_code, vendor_id)
+            return PurchaseOrder.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
-        vendor_data = validated_data.pop('vendor', None)
-
-        if vendor_data:
-            instance.vendor = self._get_or_create_vendor(vendor_data['vendor_code'])
-
-        for key, value in validated_data.items():
-            setattr(instance, key, value)
-
-        instance.save()
+        expected_version = validated_data.pop('expected_version', None)
+        vendor_code = validated_data.pop('vendor_code', None)
+        vendor_id = self._get_vendor_id(vendor_code) if vendor_code is not None else None
 
-        return instance
-
-    def _get_or_create_vendor(self, vendor_code):
         with transaction.atomic():
-            vendor_instance, _ = Vendor.objects.get_or_create(vendor_code=vendor_code)
-            return vendor_instance
+            if vendor_code is not None:
+                vendor_id = self._lock_vendor(vendor_code, vendor_id)
+                if vendor_id != instance.vendor_id:
+                    validated_data['vendor'] = Vendor.objects.get(id=vendor_id)
+
+            return save_changed_fields(instance, validated_data, expected_version)
+
+    def _lock_vendor(self, vendor_code, vendor_id):
+        # Called first thing inside the write transaction: a cached id may belong to a vendor another process has
+        # marked deleted. The conditional UPDATE locks the live vendor row, so a purge of the vendor waits for this
+        # write and then sweeps it up (see deletion.purge_vendor). It is a write rather than a locking read because
+        # SQLite ignores SELECT ... FOR UPDATE and fails to upgrade a read transaction under concurrent writers.
+        for use_cache in (True, False):
+            if not use_cache:
+                vendor_code_cache.invalidate(vendor_code, vendor_id)
+                vendor_id = self._get_vendor_id(vendor_code, use_cache=False)
+            if Vendor.all_objects.filter(id=vendor_id, deleted_at__isnull=True).update(deleted_at=None):
+                return vendor_id
+        raise serializers.ValidationError({'vendor_code': 'Vendor with this vendor code is being deleted.'})
+
+    def _get_vendor_id(self, vendor_code, use_cache=True):
+        vendor_id = get_vendor_id(vendor_code, use_cache=use_cache)
+        if vendor_id is None:
+            raise serializers.ValidationError({'vendor_code': 'Vendor with this vendor code is being deleted.'})
+        return vendor_id
 class HistoricalPerformanceSerializer(serializers.ModelSerializer):
     """
         Serializer for the HistoricalPerformance model.
@@ -150,9 +242,24 @@ class UpdateAcknowledgmentSerializer(serializers.Serializer):
         Serializer for updating acknowledgment dates in purchase orders.
 
         Fields:
-        - acknowledgment_date: New acknowledgment date for the purchase order.
+        - acknowledgment_date: New acknowledgment date for the purchase order, defaults to now.
+        """
+    acknowledgment_date = serializers.DateTimeField(required=False)
+
+class PurchaseOrderTransitionSerializer(serializers.Serializer):
+    """
+        Serializer for one entry of a batch purchase order status transition.
+
+        Fields:
+        - po_id: Identifier of the purchase order to transition.
+        - status: New status of the purchase order.
+        - quality_rating: Optional new quality rating.
+        - acknowledgment_date: Optional new acknowledgment date.
         """
-    acknowledgment_date = serializers.DateTimeField()
+    po_id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=PurchaseOrder._meta.get_field('status').choices)
+    quality_rating = serializers.FloatField(required=False, allow_null=True)
+    acknowledgment_date = serializers.DateTimeField(required=False, allow_null=True)
 
 class VendorPerformanceSerializer(serializers.Serializer):
     """
@@ -163,8 +270,49 @@ class VendorPerformanceSerializer(serializers.Serializer):
         - quality_rating_avg: Vendor's average quality rating.
         - average_response_time: Vendor's average response time.
         - fulfillment_rate: Vendor's fulfillment rate.
+        - response_time_p50, response_time_p90, response_time_p99: Percentiles of the vendor's response times,
+          in minutes; null without acknowledgments.
         """
     on_time_delivery_rate = serializers.FloatField()
     quality_rating_avg = serializers.FloatField()
     average_response_time = serializers.FloatField()
     fulfillment_rate = serializers.FloatField()
+    response_time_p50 = serializers.FloatField(allow_null=True)
+    response_time_p90 = serializers.FloatField(allow_null=True)
+    response_time_p99 = serializers.FloatField(allow_null=True)
+
+class VendorDeletionSerializer(serializers.ModelSerializer):
+    """
+        Serializer for the VendorDeletion model.
+
+        Fields:
+        - id: Deletion identifier.
+        - vendor_id: Identifier of the deleted vendor.
+        - vendor_code: Vendor code of the deleted vendor.
+        - status: Status of the purge (pending, running, completed, failed).
+        - total_rows: Number of rows to purge.
+        - deleted_rows: Number of rows purged so far.
+        - error: Error that stopped a failed purge.
+        - created_at: Time the vendor was marked deleted.
+        - finished_at: Time the purge completed.
+        """
+    class Meta:
+        model = VendorDeletion
+        fields = ['id', 'vendor_id', 'vendor_code', 'status', 'total_rows', 'deleted_rows', 'error',
+                  'created_at', 'finished_at']
+
+class ChangeLogEntrySerializer(serializers.ModelSerializer):
+    """
+        Serializer for the ChangeLogEntry model.
+
+        Fields:
+        - id: Cursor of the change event.
+        - model: Changed model (vendor or purchaseorder).
+        - object_id: Identifier of the changed object.
+        - action: Kind of change (created, updated, deleted, archived).
+        - version: Row version after the change, if known.
+        - changed_at: Time the change was recorded.
+        """
+    class Meta:
+        model = ChangeLogEntry
+        fields = ['id', 'model', 'object_id', 'action', 'version', 'changed_at']
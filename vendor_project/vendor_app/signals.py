@@ -1,8 +1,53 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import PurchaseOrder
+from django.db import transaction
+from .batching import defer_vendor_metrics
+from .events import publish_vendor_metrics
+from .models import ChangeLogEntry, PurchaseOrder, Vendor
+from .vendor_codes import invalidate_vendor
 
 @receiver(post_save, sender=PurchaseOrder)
-def update_vendor_metrics(sender, instance, **kwargs):
-    if instance.vendor:
-        instance.vendor.calculate_metrics()
\ No newline at end of file
+def update_vendor_metrics(sender, instance, update_fields=None, **kwargs):
+    metrics = PurchaseOrder.get_affected_metrics(update_fields)
+    if instance.vendor and metrics and not defer_vendor_metrics(instance.vendor_id, metrics):
+        instance.vendor.calculate_metrics(metrics)
+
+    # An order moved to another vendor also changes the metrics of the vendor it left.
+    previous_vendor_id = getattr(instance, '_previous_vendor_id', None)
+    if previous_vendor_id is not None and not defer_vendor_metrics(previous_vendor_id, Vendor.METRICS):
+        previous_vendor = Vendor.objects.filter(id=previous_vendor_id).first()
+        if previous_vendor is not None:
+            previous_vendor.calculate_metrics()
+
+@receiver(post_save, sender=Vendor)
+def push_vendor_metrics(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) & set(Vendor.METRICS):
+        metrics = {metric: getattr(instance, metric) for metric in Vendor.METRICS}
+        transaction.on_commit(lambda: publish_vendor_metrics(instance.pk, metrics))
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=PurchaseOrder)
+def record_save(sender, instance, created, **kwargs):
+    if created:
+        action = 'created'
+    elif getattr(instance, 'deleted_at', None) is not None:
+        # Marking a vendor deleted removes it from the API, its rows are purged later.
+        action = 'deleted'
+    else:
+        action = 'updated'
+    ChangeLogEntry.record(sender, action, [instance.pk], version=instance.version)
+
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=PurchaseOrder)
+def record_delete(sender, instance, **kwargs):
+    ChangeLogEntry.record(sender, 'deleted', [instance.pk])
+
+@receiver(post_save, sender=Vendor)
+def invalidate_saved_vendor_code(sender, instance, update_fields=None, **kwargs):
+    # Metric recalculations save the vendor constantly but never change what its code resolves to.
+    if update_fields is None or {'vendor_code', 'deleted_at'} & set(update_fields):
+        invalidate_vendor(instance)
+
+@receiver(post_delete, sender=Vendor)
+def invalidate_deleted_vendor_code(sender, instance, **kwargs):
+    invalidate_vendor(instance)
@@ -0,0 +1,73 @@
+"""
+Mergeable Quantile Sketches
+
+This module provides the sketch behind the vendor response time percentiles. It is a DDSketch-style logarithmic
+histogram: a value x is counted in bucket ceil(log(x) / log(gamma)), so any quantile is estimated within a fixed
+relative error, and two sketches are merged by adding the counts of equal buckets.
+
+Classes:
+- QuantileSketch: A logarithmic histogram over positive values with relative-error quantile estimates.
+
+The buckets are stored as ResponseTimeBucket rows (see models.py). Merging sketches across vendors or months is then
+a SUM(count) ... GROUP BY index over those rows, and recording a value is an increment of one row.
+"""
+import math
+
+# Quantiles are estimated within 1% of the true value.
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+# Values below this (one second, in minutes) are counted as this value; negative response times included.
+MIN_VALUE = 1 / 60
+
+
+class QuantileSketch:
+    """
+    Logarithmic histogram over positive values.
+
+    Attributes:
+    - counts (dict): Maps bucket indexes to the number of values counted in them.
+    """
+
+    def __init__(self, counts=None):
+        self.counts = dict(counts or {})
+
+    @staticmethod
+    def get_index(value):
+        return math.ceil(math.log(max(value, MIN_VALUE)) / LOG_GAMMA)
+
+    @staticmethod
+    def get_value(index):
+        # The point of the bucket (gamma^(i-1), gamma^i] with the smallest relative error to both bounds.
+        return 2 * GAMMA ** index / (GAMMA + 1)
+
+    @property
+    def count(self):
+        return sum(self.counts.values())
+
+    def add(self, value, count=1):
+        index = self.get_index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        return self
+
+    def quantile(self, q):
+        """
+        Estimate the q-quantile (0 <= q <= 1) of the counted values.
+
+        Returns:
+        - float: The estimate, or None for an empty sketch.
+        """
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen > rank:
+                return self.get_value(index)
+        return self.get_value(max(self.counts))
@@ -0,0 +1,177 @@
+"""
+Admission Control
+
+This module keeps a few clients flooding the list and performance endpoints from starving purchase order writes.
+
+Classes:
+- TokenBucket: A thread-safe token bucket refilling at a constant rate up to a burst size.
+- TokenBucketThrottle: DRF throttle applying one in-memory token bucket per client and endpoint class.
+- ServiceOverloaded: API exception answered with 503 and Retry-After when admission is refused.
+- ConcurrencyLimitMixin: View mixin capping how many expensive reads a process serves at once.
+
+Settings:
+- VENDOR_THROTTLE_RATES: Maps an endpoint class (throttle scope) to its (rate, burst) pair, the rate written as in
+  DRF ("10/s", "600/min"). Scopes missing from the mapping are not throttled.
+- VENDOR_EXPENSIVE_CONCURRENCY: Maximum number of expensive reads in flight per process.
+
+Clients are identified by their token (or user), and by their address when anonymous. Reads are throttled under the
+view's `throttle_scope`, writes under the shared 'write' scope, so read floods never use up write allowances.
+Buckets are held per process; with several workers the effective limits scale with the number of workers.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+WRITE_SCOPE = 'write'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a DRF style rate ("10/s", "600/min") into requests per second.
+    """
+    num, period = rate.split('/')
+    return int(num) / DURATIONS[period[0]]
+
+
+class TokenBucket:
+    """
+    Token bucket refilling `rate` tokens per second up to `burst` tokens.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """
+        Take one token.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until the next token is available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def is_full(self):
+        return self.tokens + (time.monotonic() - self.updated) * self.rate >= self.burst
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle keeping one token bucket per client and endpoint class.
+
+    Views set `throttle_scope` to the class of their reads (for example 'list' or 'performance'); views
+    without one are read under 'detail'. Unsafe methods always use the 'write' scope.
+    """
+    default_scope = 'detail'
+    # Full buckets carry no state worth keeping; they are dropped once this many buckets exist.
+    max_buckets = 10000
+
+    buckets = {}
+    buckets_lock = threading.Lock()
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_scope(self, request, view):
+        if request.method not in SAFE_METHODS:
+            return WRITE_SCOPE
+        return getattr(view, 'throttle_scope', self.default_scope)
+
+    def get_ident(self, request):
+        if request.auth is not None:
+            return 'token:%s' % getattr(request.auth, 'pk', request.auth)
+        if request.user and request.user.is_authenticated:
+            return 'user:%s' % request.user.pk
+        return 'addr:%s' % super().get_ident(request)
+
+    def get_bucket(self, scope, ident):
+        rates = getattr(settings, 'VENDOR_THROTTLE_RATES', {})
+        if scope not in rates:
+            return None
+        key = (scope, ident)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            rate, burst = rates[scope]
+            with self.buckets_lock:
+                if len(self.buckets) >= self.max_buckets:
+                    for stale in [k for k, b in self.buckets.items() if b.is_full()]:
+                        del self.buckets[stale]
+                bucket = self.buckets.setdefault(key, TokenBucket(parse_rate(rate), burst))
+        return bucket
+
+    def allow_request(self, request, view):
+        bucket = self.get_bucket(self.get_scope(request, view), self.get_ident(request))
+        if bucket is None:
+            return True
+        self.wait_time = bucket.take()
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class ServiceOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many expensive requests in progress, try again later.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait=1):
+        super().__init__()
+        # Picked up by DRF's exception handler for the Retry-After header.
+        self.wait = math.ceil(wait)
+
+
+class ConcurrencyLimitMixin:
+    """
+    Mixin refusing expensive reads with 503 once VENDOR_EXPENSIVE_CONCURRENCY of them are in flight.
+
+    The limit is shared by all views using the mixin and only applies to safe methods, so writes
+    on the same endpoints are admitted regardless. Requests are refused instead of queued, so a
+    read flood cannot build up a backlog in front of the workers.
+    """
+    _expensive_slots = None
+    _expensive_slots_lock = threading.Lock()
+
+    @classmethod
+    def get_expensive_slots(cls):
+        with cls._expensive_slots_lock:
+            if ConcurrencyLimitMixin._expensive_slots is None:
+                ConcurrencyLimitMixin._expensive_slots = threading.BoundedSemaphore(
+                    getattr(settings, 'VENDOR_EXPENSIVE_CONCURRENCY', 4))
+        return ConcurrencyLimitMixin._expensive_slots
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication and throttling run first, so throttled clients never take a slot.
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            slots = self.get_expensive_slots()
+            if not slots.acquire(blocking=False):
+                raise ServiceOverloaded()
+            self._holds_expensive_slot = True
+
+    def dispatch(self, request, *args, **kwargs):
+        # Released on every way out of the view, including exceptions that DRF does not handle and re-raises.
+        self._holds_expensive_slot = False
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._holds_expensive_slot:
+                self._holds_expensive_slot = False
+                self.get_expensive_slots().release()
@@ -0,0 +1,141 @@
+"""
+Vendor Code Resolution Cache
+
+Purchase orders reference their vendor by vendor_code. Ingest traffic uses the same few thousand codes over and over,
+so the code-to-id mapping is cached in-process instead of running a get_or_create for every purchase order.
+
+Classes:
+- VendorCodeCache: A bounded, thread-safe LRU cache mapping vendor codes to vendor ids.
+
+Functions:
+- get_vendor_id: Resolve a vendor code to the id of its vendor, creating the vendor if needed.
+- invalidate_vendor: Drop the cached entries of a vendor.
+
+Settings:
+- VENDOR_CODE_CACHE_SIZE: Maximum number of cached codes.
+- VENDOR_CODE_CACHE_TTL: Seconds a resolved code is trusted.
+- VENDOR_CODE_CACHE_NEGATIVE_TTL: Seconds a code of a vendor being deleted is remembered as unusable.
+
+Vendor saves and deletes invalidate the entries of the current process right away (see signals.py). Other processes
+pick up changes once the TTLs expire, so callers that write with a cached id check inside their write transaction
+that the vendor is still live and resolve the code again with `use_cache=False` if not.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Vendor
+
+
+class VendorCodeCache:
+    """
+    LRU cache mapping vendor codes to vendor ids, or to None for codes that cannot be used.
+    """
+
+    def __init__(self, max_size=10000, ttl=300, negative_ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._codes_by_id = {}
+        self._lock = threading.Lock()
+
+    def get(self, vendor_code):
+        """
+        Look up a vendor code.
+
+        Returns:
+        - tuple: (hit, vendor_id); vendor_id is None for codes cached as unusable.
+        """
+        with self._lock:
+            entry = self._entries.get(vendor_code)
+            if entry is None:
+                return False, None
+            vendor_id, expires = entry
+            if expires < time.monotonic():
+                self._remove(vendor_code)
+                return False, None
+            self._entries.move_to_end(vendor_code)
+            return True, vendor_id
+
+    def set(self, vendor_code, vendor_id):
+        """
+        Cache the vendor id of a code, or None to remember the code as unusable.
+        """
+        ttl = self.ttl if vendor_id is not None else self.negative_ttl
+        with self._lock:
+            self._remove(vendor_code)
+            self._entries[vendor_code] = (vendor_id, time.monotonic() + ttl)
+            if vendor_id is not None:
+                self._codes_by_id.setdefault(vendor_id, set()).add(vendor_code)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, vendor_code=None, vendor_id=None):
+        """
+        Drop the entry of a code and every entry resolving to a vendor id.
+        """
+        with self._lock:
+            if vendor_code is not None:
+                self._remove(vendor_code)
+            for code in list(self._codes_by_id.get(vendor_id, ())):
+                self._remove(code)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._codes_by_id.clear()
+
+    def _remove(self, vendor_code):
+        entry = self._entries.pop(vendor_code, None)
+        if entry is not None and entry[0] is not None:
+            codes = self._codes_by_id[entry[0]]
+            codes.discard(vendor_code)
+            if not codes:
+                del self._codes_by_id[entry[0]]
+
+
+vendor_code_cache = VendorCodeCache(
+    max_size=getattr(settings, 'VENDOR_CODE_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'VENDOR_CODE_CACHE_TTL', 300),
+    negative_ttl=getattr(settings, 'VENDOR_CODE_CACHE_NEGATIVE_TTL', 30),
+)
+
+
+def get_vendor_id(vendor_code, use_cache=True):
+    """
+    Resolve a vendor code to the id of its vendor, creating the vendor if it does not exist yet.
+
+    Args:
+    - vendor_code (str): The vendor code.
+    - use_cache (bool): Whether a cached id may be returned. The database is always consulted with False.
+
+    Returns:
+    - int: The vendor id, or None if the vendor with this code is being deleted.
+    """
+    if use_cache:
+        hit, vendor_id = vendor_code_cache.get(vendor_code)
+        if hit:
+            return vendor_id
+
+    # Not wrapped in a transaction of its own: on SQLite, a transaction that reads before it writes cannot take the
+    # write lock under concurrent writers. get_or_create already recovers from a concurrent create.
+    vendor_instance, _ = Vendor.all_objects.get_or_create(vendor_code=vendor_code)
+    vendor_id = vendor_instance.id if vendor_instance.deleted_at is None else None
+    # Cached once committed, so a vendor created by a transaction that rolls back is never cached.
+    transaction.on_commit(lambda: vendor_code_cache.set(vendor_code, vendor_id))
+    return vendor_id
+
+
+def invalidate_vendor(vendor):
+    """
+    Drop the cached entries of a vendor, both under its current code and under any code it had before.
+
+    The entries are dropped again once the surrounding transaction commits, so a lookup made meanwhile cannot keep
+    the state from before the change cached.
+    """
+    vendor_code_cache.invalidate(vendor.vendor_code, vendor.pk)
+    transaction.on_commit(lambda: vendor_code_cache.invalidate(vendor.vendor_code, vendor.pk))
@@ -1,21 +1,203 @@
+import hashlib
+import json
+import time
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Case, F, Value, When
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views import View
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.db import transaction
-from rest_framework import status
+from rest_framework import serializers, status
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
 from rest_framework.authentication import TokenAuthentication  # Add TokenAuthentication
 from rest_framework.permissions import IsAuthenticated  # Add IsAuthenticated
-from .models import Vendor, PurchaseOrder, HistoricalPerformance
-from .serializers import VendorSerializer, PurchaseOrderSerializer, HistoricalPerformanceSerializer, VendorPerformanceSerializer
+from .batching import get_group_committer
+from .events import get_broker, load_vendor_metrics
+from .throttling import ConcurrencyLimitMixin
+from .models import (
+    Vendor,
+    PurchaseOrder,
+    PurchaseOrderLine,
+    ArchivedPurchaseOrder,
+    HistoricalPerformance,
+    ResponseTimeBucket,
+    VendorDeletion,
+    ChangeLogEntry,
+    VersionConflictError,
+)
+from .serializers import (
+    VendorSerializer,
+    PurchaseOrderSerializer,
+    HistoricalPerformanceSerializer,
+    VendorPerformanceSerializer,
+    PurchaseOrderTransitionSerializer,
+    UpdateAcknowledgmentSerializer,
+    VendorDeletionSerializer,
+    ChangeLogEntrySerializer,
+)
+
+class SparseFieldsetMixin:
+    """
+    Mixin adding `?fields=` / `?exclude=` support to views.
+
+    The requested fields narrow both the serializer and the queryset (via `.only()` / `.defer()`),
+    so unused columns are neither fetched, deserialized nor rendered.
+
+    Subclasses need to define `serializer_class` (using DynamicFieldsMixin) and `model_class`.
+    """
+
+    def get_sparse_fieldset(self, request, queryset):
+        """
+        Narrow a queryset and the serializer to the requested fields.
+
+        Returns:
+            tuple: The narrowed queryset and the keyword arguments for `serializer_class`.
+
+        Raises:
+            ValidationError: If an unknown field is requested.
+        """
+        serializer_fields = self.serializer_class().fields
+        readable = {name: field for name, field in serializer_fields.items() if not field.write_only}
+
+        serializer_kwargs = {}
+        for param in ('fields', 'exclude'):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+
+            names = [name.strip() for name in value.split(',') if name.strip()]
+            if not names:
+                # An empty list selects nothing to narrow, i.e. the full representation.
+                continue
+            unknown = [name for name in names if name not in readable]
+            if unknown:
+                raise ValidationError({param: 'Unknown field(s): %s.' % ', '.join(unknown)})
+            serializer_kwargs[param] = names
+
+        if 'fields' in serializer_kwargs:
+            queryset = queryset.only(*self._get_columns(readable, serializer_kwargs['fields']))
+        if 'exclude' in serializer_kwargs:
+            queryset = queryset.defer(*self._get_columns(readable, serializer_kwargs['exclude']))
+
+        return queryset, serializer_kwargs
+
+    def _get_columns(self, readable, names):
+        columns = []
+        for name in names:
+            source = readable[name].source
+            try:
+                field = self.model_class._meta.get_field(source)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.primary_key:
+                columns.append(field.name)
+        return columns
+
+class ConditionalGetMixin:
+    """
+    Mixin answering conditional requests on detail views.
+
+    Strong ETags and Last-Modified are derived from the row version (see VersionedModel), which is
+    fetched with a single primary key lookup before anything is serialized, so unchanged objects
+    are answered with 304 without loading or rendering the body.
+
+    Subclasses need to define `model_class`.
+    """
+    # Query parameters selecting a different representation of the same row.
+    variant_params = ('fields', 'exclude')
+
+    def get_validators(self, request, pk):
+        """
+        Look up the ETag and Last-Modified validators of a specific instance.
+
+        Returns:
+            tuple: The quoted ETag and the last modification time.
+
+        Raises:
+            Http404: If the instance does not exist.
+        """
+        row = self.model_class.objects.filter(pk=pk).values_list('version', 'updated_at').first()
+        if row is None:
+            raise Http404
+        version, updated_at = row
+
+        return self.make_etag(request, pk, version), updated_at
+
+    def make_etag(self, request, pk, version):
+        etag = '%s-%s' % (pk, version)
+        variant = '&'.join('%s=%s' % (param, request.query_params[param])
+                           for param in self.variant_params if param in request.query_params)
+        if variant:
+            etag = '%s-%s' % (etag, hashlib.md5(variant.encode()).hexdigest()[:8])
+        return '"%s"' % etag
+
+    def get_conditional_response(self, request, etag, updated_at):
+        """
+        Evaluate the request preconditions.
 
-class BaseCreateView(APIView):
+        Returns:
+            HttpResponse: A 304/412 response, or None if the request should be processed.
+        """
+        response = get_conditional_response(request, etag=etag, last_modified=int(updated_at.timestamp()))
+        if response is not None:
+            self.set_validators(response, etag, updated_at)
+        return response
+
+    def set_validators(self, response, etag, updated_at):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(updated_at.timestamp())
+        return response
+
+    def partial_update(self, request, instance):
+        """
+        Apply a PATCH to an instance, writing only the changed fields.
+
+        If the request carries `If-Match`, the write only succeeds while the row is still at the
+        version the ETag was compared against.
+
+        Returns:
+            Response: HTTP response with serialized instance data, errors, or 412 if a precondition failed.
+        """
+        etag = self.make_etag(request, instance.pk, instance.version)
+        response = self.get_conditional_response(request, etag, instance.updated_at)
+        if response is not None:
+            return response
+
+        expected_version = instance.version if 'HTTP_IF_MATCH' in request.META else None
+        serializer = self.serializer_class(instance, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            serializer.save(expected_version=expected_version)
+        except VersionConflictError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_412_PRECONDITION_FAILED)
+
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+        return self.set_validators(response, self.make_etag(request, instance.pk, instance.version),
+                                   instance.updated_at)
+
+class BaseCreateView(ConcurrencyLimitMixin, APIView):
     """
     Base class for creating and listing instances.
+    Listing is throttled as an expensive 'list' read.
 
     Subclasses need to define `serializer_class` and `model_class`.
     """
     serializer_class = None
     model_class = None
+    throttle_scope = 'list'
 
     def post(self, request):
         """
@@ -48,30 +230,158 @@ class VendorListView(BaseCreateView):
     serializer_class = VendorSerializer
     model_class = Vendor
 
-class PurchaseOrderListView(BaseCreateView):
+class PurchaseOrderListView(SparseFieldsetMixin, BaseCreateView):
     """
     View for creating and listing PurchaseOrder instances.
-    Supports filtering by vendor_id using query parameters.
+    Supports filtering by vendor_id or item_name and sparse fieldsets (`fields` / `exclude`) using query parameters.
+    Archived purchase orders are only listed with `include_archived=true`.
+
+    Live purchase orders can also be filtered by `status` and `acknowledged`, by one range
+    (`<field>__gte`, `__gt`, `__lte`, `__lt`) over a date field or quality_rating, and ordered with
+    `ordering=<field>` / `-<field>`. Only combinations listed in PurchaseOrder.LIST_INDEX_PATHS are
+    accepted, so each list is a range scan of one index; others are rejected with 400.
     """
     serializer_class = PurchaseOrderSerializer
     model_class = PurchaseOrder
+    range_fields = {
+        'order_date': serializers.DateTimeField(),
+        'delivery_date': serializers.DateTimeField(),
+        'issue_date': serializers.DateTimeField(),
+        'quality_rating': serializers.FloatField(),
+    }
+    range_lookups = ('gte', 'gt', 'lte', 'lt')
+    equality_params = ('acknowledged', 'status', 'vendor_id')
+
+    def post(self, request):
+        """
+        Create a new PurchaseOrder instance, group committed with concurrent creates if
+        PURCHASE_ORDER_GROUP_COMMIT is enabled.
+
+        Returns:
+            Response: HTTP response with serialized instance data or errors.
+        """
+        if not getattr(settings, 'PURCHASE_ORDER_GROUP_COMMIT', False):
+            return super().post(request)
+        serializer = self.serializer_class(data=request.data)
+        if serializer.is_valid():
+            get_group_committer().submit(serializer.save)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get(self, request):
         """
-        List all PurchaseOrder instances or filter by vendor_id.
+        List all PurchaseOrder instances or filter by vendor_id and/or item_name.
 
         Returns:
             Response: HTTP response with serialized instances data.
         """
+        include_archived = request.query_params.get('include_archived', '').lower() in ('1', 'true', 'yes')
         vendor_id = request.query_params.get('vendor_id')
         if vendor_id:
+            if not vendor_id.isdigit():
+                return Response({'detail': 'vendor_id must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
             instances = self.model_class.objects.filter(vendor__id=vendor_id)
         else:
             instances = self.model_class.objects.all()
 
-        serializer = self.serializer_class(instances, many=True)
+        instances, indexed_filters = self.apply_indexed_filters(request, instances)
+        if indexed_filters and (include_archived or request.query_params.get('item_name')):
+            return Response({'detail': 'status, acknowledged, range filters and ordering cannot be combined '
+                                       'with item_name or include_archived.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        item_name = request.query_params.get('item_name')
+        if item_name:
+            if include_archived:
+                return Response({'detail': 'item_name cannot be combined with include_archived.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            # Resolved through the indexed line-item table instead of scanning the items JSON.
+            instances = instances.filter(id__in=PurchaseOrderLine.objects.filter(item_name=item_name)
+                                         .values('purchase_order_id'))
+
+        instances, serializer_kwargs = self.get_sparse_fieldset(request, instances)
+
+        if include_archived:
+            archived = ArchivedPurchaseOrder.objects.filter(vendor__deleted_at__isnull=True)
+            if vendor_id:
+                archived = archived.filter(vendor__id=vendor_id)
+            columns = [field.source for field in self.serializer_class(**serializer_kwargs).fields.values()
+                       if not field.write_only]
+            instances = instances.values(*columns).union(archived.values(*columns), all=True)
+
+        serializer = self.serializer_class(instances, many=True, **serializer_kwargs)
         return Response(serializer.data)
 
+    def apply_indexed_filters(self, request, queryset):
+        """
+        Apply the status, acknowledged, range and ordering parameters to a purchase order queryset.
+
+        Returns:
+            tuple: The filtered queryset and whether any of these parameters was given.
+
+        Raises:
+            ValidationError: If a value is invalid or the combination has no backing index.
+        """
+        params = request.query_params
+        filters = {}
+        equality = tuple(name for name in self.equality_params if params.get(name))
+
+        order_status = params.get('status')
+        if order_status:
+            if order_status not in dict(self.model_class._meta.get_field('status').choices):
+                raise ValidationError({'status': 'Unknown status.'})
+            filters['status'] = order_status
+        acknowledged = params.get('acknowledged')
+        if acknowledged:
+            if acknowledged.lower() not in ('true', 'false'):
+                raise ValidationError({'acknowledged': 'Must be true or false.'})
+            filters['acknowledgment_date__isnull'] = acknowledged.lower() == 'false'
+
+        range_field = None
+        for name, field in self.range_fields.items():
+            for lookup in self.range_lookups:
+                param = '%s__%s' % (name, lookup)
+                if param not in params:
+                    continue
+                if range_field not in (None, name):
+                    raise ValidationError({'detail': 'Only one field can be range-filtered.'})
+                range_field = name
+                try:
+                    filters[param] = field.to_internal_value(params[param])
+                except ValidationError as exc:
+                    raise ValidationError({param: exc.detail})
+
+        ordering = params.get('ordering')
+        if ordering:
+            order_field = ordering[1:] if ordering.startswith('-') else ordering
+            if order_field not in self.get_ordering_fields():
+                raise ValidationError({'ordering': 'Unknown ordering field.'})
+            if range_field not in (None, order_field):
+                raise ValidationError({'ordering': 'Lists can only be ordered by their range-filtered field.'})
+            range_field = order_field
+
+        if not filters and not ordering:
+            return queryset, False
+
+        path = self.model_class.LIST_INDEX_PATHS.get(equality)
+        if path is None:
+            raise ValidationError({'detail': 'Filters %s cannot be combined.' % ', '.join(equality)})
+        if range_field is not None and range_field not in path and not (range_field == 'id' and not equality):
+            raise ValidationError({'detail': '%s cannot be range-filtered or ordered by with the filters %s.' % (
+                range_field, ', '.join(equality) or '(none)')})
+
+        queryset = queryset.filter(**filters)
+        if ordering:
+            queryset = queryset.order_by(ordering)
+        return queryset, True
+
+    def get_ordering_fields(self):
+        # The fields of the index paths, and the primary key, which unfiltered lists can be ordered by.
+        fields = {'id'}
+        for path in self.model_class.LIST_INDEX_PATHS.values():
+            fields.update(path)
+        return fields
+
 class HistoricalPerformanceListView(BaseCreateView):
     """
     View for creating and listing HistoricalPerformance instances.
@@ -79,9 +389,10 @@ class HistoricalPerformanceListView(BaseCreateView):
     serializer_class = HistoricalPerformanceSerializer
     model_class = HistoricalPerformance
 
-class VendorDetailView(APIView):
+class VendorDetailView(ConditionalGetMixin, APIView):
     """
     View for retrieving, updating, and deleting Vendor instances.
+    Retrieval and PATCH support conditional requests (ETag / Last-Modified, If-Match).
     """
     serializer_class = VendorSerializer
     model_class = Vendor
@@ -91,11 +402,16 @@ class VendorDetailView(APIView):
         Retrieve a specific Vendor instance.
 
         Returns:
-            Response: HTTP response with serialized instance data or 404 if not found.
+            Response: HTTP response with serialized instance data, 304 if not modified or 404 if not found.
         """
+        etag, updated_at = self.get_validators(request, vendor_id)
+        response = self.get_conditional_response(request, etag, updated_at)
+        if response is not None:
+            return response
+
         instance = get_object_or_404(self.model_class, id=vendor_id)
         serializer = self.serializer_class(instance)
-        return Response(serializer.data)
+        return self.set_validators(Response(serializer.data), etag, updated_at)
 
     def put(self, request, vendor_id):
         """
@@ -111,20 +427,35 @@ class VendorDetailView(APIView):
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def patch(self, request, vendor_id):
+        """
+        Partially update a specific Vendor instance.
+
+        Returns:
+            Response: HTTP response with serialized instance data, errors, or 412 if a precondition failed.
+        """
+        instance = get_object_or_404(self.model_class, id=vendor_id)
+        return self.partial_update(request, instance)
+
     def delete(self, request, vendor_id):
         """
         Delete a specific Vendor instance.
 
+        The vendor is hidden immediately; it and its dependent rows are purged in the background
+        (see vendor_app.deletion).
+
         Returns:
-            Response: HTTP response with 204 status.
+            Response: HTTP response with 202 status and the queued deletion.
         """
         instance = get_object_or_404(self.model_class, id=vendor_id)
-        instance.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        deletion = instance.mark_deleted()
+        return Response(VendorDeletionSerializer(deletion).data, status=status.HTTP_202_ACCEPTED)
 
-class PurchaseOrderDetailView(APIView):
+class PurchaseOrderDetailView(SparseFieldsetMixin, ConditionalGetMixin, APIView):
     """
     View for retrieving, updating, and deleting PurchaseOrder instances.
+    Retrieval supports sparse fieldsets (`fields` / `exclude`) using query parameters; retrieval
+    and PATCH support conditional requests (ETag / Last-Modified, If-Match).
     """
     serializer_class = PurchaseOrderSerializer
     model_class = PurchaseOrder
@@ -134,11 +465,17 @@ class PurchaseOrderDetailView(APIView):
         Retrieve a specific PurchaseOrder instance.
 
         Returns:
-            Response: HTTP response with serialized instance data or 404 if not found.
+            Response: HTTP response with serialized instance data, 304 if not modified or 404 if not found.
         """
-        instance = get_object_or_404(self.model_class, id=po_id)
-        serializer = self.serializer_class(instance)
-        return Response(serializer.data)
+        etag, updated_at = self.get_validators(request, po_id)
+        response = self.get_conditional_response(request, etag, updated_at)
+        if response is not None:
+            return response
+
+        queryset, serializer_kwargs = self.get_sparse_fieldset(request, self.model_class.objects.all())
+        instance = get_object_or_404(queryset, id=po_id)
+        serializer = self.serializer_class(instance, **serializer_kwargs)
+        return self.set_validators(Response(serializer.data), etag, updated_at)
 
     def delete(self, request, po_id):
         """
@@ -167,13 +504,42 @@ class PurchaseOrderDetailView(APIView):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class VendorPerformanceView(APIView):
+    def patch(self, request, po_id):
+        """
+        Partially update a specific PurchaseOrder instance.
+
+        Returns:
+            Response: HTTP response with serialized instance data, errors, or 412 if a precondition failed.
+        """
+        instance = get_object_or_404(self.model_class, id=po_id)
+        return self.partial_update(request, instance)
+
+class VendorDeletionView(APIView):
+    """
+    View for retrieving the progress of a background vendor purge.
+    """
+    serializer_class = VendorDeletionSerializer
+
+    def get(self, request, deletion_id):
+        """
+        Retrieve a specific VendorDeletion instance.
+
+        Returns:
+            Response: HTTP response with serialized deletion progress or 404 if not found.
+        """
+        deletion = get_object_or_404(VendorDeletion, id=deletion_id)
+        serializer = self.serializer_class(deletion)
+        return Response(serializer.data)
+
+class VendorPerformanceView(ConcurrencyLimitMixin, APIView):
     """
     View for retrieving Vendor performance metrics.
+    Throttled as an expensive 'performance' read.
     """
     serializer_class = VendorPerformanceSerializer
     authentication_classes = [TokenAuthentication]  # Add TokenAuthentication
     permission_classes = [IsAuthenticated]  # Add IsAuthenticated
+    throttle_scope = 'performance'
 
     def get(self, request, vendor_id):
         """
@@ -189,12 +555,17 @@ class VendorPerformanceView(APIView):
         quality_rating_avg = vendor.calculate_quality_rating_avg()
         average_response_time = vendor.calculate_average_response_time()
         fulfillment_rate = vendor.calculate_fulfillment_rate()
+        # Read from the vendor's response time sketch, without scanning its purchase orders.
+        response_times = ResponseTimeBucket.get_sketch(vendor_ids=[vendor.id])
 
         data = {
             'on_time_delivery_rate': on_time_delivery_rate,
             'quality_rating_avg': quality_rating_avg,
             'average_response_time': average_response_time,
             'fulfillment_rate': fulfillment_rate,
+            'response_time_p50': response_times.quantile(0.5),
+            'response_time_p90': response_times.quantile(0.9),
+            'response_time_p99': response_times.quantile(0.99),
         }
 
         serializer = self.serializer_class(data)
@@ -202,7 +573,7 @@ class VendorPerformanceView(APIView):
 
 class UpdateAcknowledgmentView(APIView):
     """
-    View for retrieving acknowledgment date of a PurchaseOrder.
+    View for retrieving and setting the acknowledgment date of a PurchaseOrder.
     """
     authentication_classes = [TokenAuthentication]  # Add TokenAuthentication
     permission_classes = [IsAuthenticated]  # Add IsAuthenticated
@@ -221,3 +592,240 @@ class UpdateAcknowledgmentView(APIView):
             return Response({'detail': 'Acknowledgment date is not available.'}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({'acknowledgment_date': acknowledgment_date}, status=status.HTTP_200_OK)
+
+    def post(self, request, po_id):
+        """
+        Acknowledge a specific PurchaseOrder.
+
+        The acknowledgment is a single conditional UPDATE that only succeeds while the purchase order
+        is unacknowledged (see PurchaseOrder.acknowledge).
+
+        Returns:
+            Response: HTTP response with the acknowledgment date, errors, 404 if not found or 409 if
+            the purchase order was already acknowledged.
+        """
+        serializer = UpdateAcknowledgmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        acknowledgment_date = serializer.validated_data.get('acknowledgment_date') or timezone.now()
+        if PurchaseOrder.acknowledge(po_id, acknowledgment_date):
+            return Response({'acknowledgment_date': acknowledgment_date}, status=status.HTTP_200_OK)
+
+        get_object_or_404(PurchaseOrder.objects.only('id'), id=po_id)
+        return Response({'detail': 'Purchase order is already acknowledged.'}, status=status.HTTP_409_CONFLICT)
+
+    patch = post
+
+class PurchaseOrderBulkTransitionView(APIView):
+    """
+    View for transitioning many PurchaseOrder instances at once.
+
+    The transitions are validated against PurchaseOrder.STATUS_TRANSITIONS and applied inside one
+    transaction with a single UPDATE, whose new values are CASE expressions over the purchase order id.
+    Vendor metrics are recomputed once per affected vendor, instead of once per purchase order,
+    and the response time sketches are updated for every acknowledgment date set, in the same transaction.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = PurchaseOrderTransitionSerializer
+    max_batch_size = 1000
+
+    def post(self, request):
+        """
+        Apply a list of (po_id, status, quality_rating, acknowledgment_date) transitions.
+
+        Returns:
+            Response: HTTP response with the number of updated purchase orders, or errors if any
+            transition is invalid, in which case nothing is applied.
+        """
+        serializer = self.serializer_class(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        transitions = serializer.validated_data
+        if len(transitions) > self.max_batch_size:
+            return Response({'detail': 'At most %s transitions can be applied at once.' % self.max_batch_size},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        po_ids = [transition['po_id'] for transition in transitions]
+        if len(set(po_ids)) != len(po_ids):
+            return Response({'detail': 'Each purchase order can only be transitioned once per batch.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            current = {
+                po.id: po for po in PurchaseOrder.objects.select_for_update().filter(id__in=po_ids)
+                .only('id', 'status', 'vendor_id', 'issue_date', 'acknowledgment_date')
+            }
+
+            # Errors are reported per entry, in the shape of the serializer's list errors.
+            errors = [{} for _ in transitions]
+            for error, transition in zip(errors, transitions):
+                po_id = transition['po_id']
+                if po_id not in current:
+                    error['po_id'] = ['Purchase order does not exist.']
+                elif not PurchaseOrder.can_transition(current[po_id].status, transition['status']):
+                    error['status'] = [
+                        'Cannot transition from %s to %s.' % (current[po_id].status, transition['status'])]
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+            affected_metrics = defaultdict(set)
+            for transition in transitions:
+                vendor_id = current[transition['po_id']].vendor_id
+                affected_metrics[vendor_id].update(PurchaseOrder.get_affected_metrics(transition))
+
+            now = timezone.now()
+            PurchaseOrder.objects.filter(id__in=po_ids).update(
+                version=F('version') + 1, updated_at=now, **self.get_update_values(transitions, now))
+            ChangeLogEntry.record(PurchaseOrder, 'updated', po_ids)
+
+            for transition in transitions:
+                if 'acknowledgment_date' in transition:
+                    po = current[transition['po_id']]
+                    po._loaded_response_sample = po.get_response_sample()
+                    po.acknowledgment_date = transition['acknowledgment_date']
+                    po.update_response_sample()
+
+            for vendor in Vendor.objects.filter(id__in=affected_metrics):
+                metrics = [metric for metric in Vendor.METRICS if metric in affected_metrics[vendor.id]]
+                if metrics:
+                    vendor.calculate_metrics(metrics)
+
+        return Response({'updated': len(po_ids)}, status=status.HTTP_200_OK)
+
+    def get_update_values(self, transitions, now):
+        """
+        Return the queryset.update() values applying all transitions in one UPDATE: every field set by
+        some transition becomes a CASE over the purchase order id, keeping the current value of the others.
+        """
+        values = {}
+        for name in ('status', 'quality_rating', 'acknowledgment_date'):
+            whens = [When(id=transition['po_id'], then=Value(transition[name]))
+                     for transition in transitions if name in transition]
+            if whens:
+                values[name] = Case(*whens, default=F(name), output_field=PurchaseOrder._meta.get_field(name))
+
+        completed_ids = [transition['po_id'] for transition in transitions if transition['status'] == 'completed']
+        for name, value in PurchaseOrder.get_completion_updates(now).items():
+            values[name] = Case(When(id__in=completed_ids, then=value), default=Value(None),
+                                output_field=PurchaseOrder._meta.get_field(name))
+        return values
+
+class ChangeFeedView(APIView):
+    """
+    View for reading the change log of vendors and purchase orders incrementally.
+
+    Consumers pass the `next_cursor` of their previous page as `since` and receive the changes
+    after it in order, so a sync costs as much as the number of changes, not the table sizes.
+
+    Entries younger than CHANGE_FEED_SETTLE_SECONDS are held back, so that a change committed
+    late by a slower transaction is not skipped by a cursor that already moved past its id.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = ChangeLogEntrySerializer
+    default_limit = 100
+    max_limit = 1000
+
+    def get(self, request):
+        """
+        List the changes after the `since` cursor, at most `limit` of them.
+
+        Returns:
+            Response: HTTP response with the changes, the cursor to resume from and whether more
+            changes are available.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            return Response({'detail': 'since and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if since < 0 or limit < 1:
+            return Response({'detail': 'since must be >= 0 and limit >= 1.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        settled_before = timezone.now() - timedelta(seconds=getattr(settings, 'CHANGE_FEED_SETTLE_SECONDS', 2))
+        entries = list(ChangeLogEntry.objects.filter(id__gt=since, changed_at__lte=settled_before)
+                       .order_by('id')[:limit + 1])
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        return Response({
+            'changes': self.serializer_class(entries, many=True).data,
+            'next_cursor': entries[-1].id if entries else since,
+            'has_more': has_more,
+        })
+
+class VendorMetricsStreamView(View):
+    """
+    View streaming vendor metric updates as server-sent events.
+
+    Clients subscribe to vendors with `?vendor_id=1,2,3`, receive a `metrics` event with the current
+    metrics of each of them, and then one whenever a vendor's metrics are recomputed (see
+    vendor_app.events). A comment line is sent as heartbeat while nothing changes.
+
+    The stream is an async iterator, so it must be served by an ASGI server. It ends after
+    VENDOR_EVENTS_MAX_STREAM_SECONDS and clients reconnect to resume.
+    """
+    max_vendors = 1000
+
+    async def get(self, request):
+        """
+        Stream metric updates of the requested vendors.
+
+        Returns:
+            StreamingHttpResponse: `text/event-stream` response, or a JSON error response.
+        """
+        try:
+            user_auth = await sync_to_async(TokenAuthentication().authenticate)(request)
+        except AuthenticationFailed as exc:
+            return JsonResponse({'detail': str(exc.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+        if user_auth is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'},
+                                status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            vendor_ids = {int(vendor_id) for vendor_id in request.GET.get('vendor_id', '').split(',') if vendor_id}
+        except ValueError:
+            return JsonResponse({'detail': 'vendor_id must be a comma separated list of ids.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        if not vendor_ids or len(vendor_ids) > self.max_vendors:
+            return JsonResponse({'detail': 'Subscribe to between 1 and %d vendors.' % self.max_vendors},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        # Subscribe before reading the snapshot, so no update falls between the two.
+        broker = get_broker()
+        subscription = broker.subscribe(vendor_ids)
+        try:
+            await broker.wait_ready()
+            snapshot = await sync_to_async(load_vendor_metrics)(vendor_ids)
+
+            response = StreamingHttpResponse(self.stream(subscription, snapshot), content_type='text/event-stream')
+            # Closed with the response too, which covers a response that is never iterated. Closing is idempotent.
+            response._resource_closers.append(subscription.close)
+        except BaseException:
+            # Including cancellation of the request while waiting.
+            subscription.close()
+            raise
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, subscription, snapshot):
+        heartbeat = getattr(settings, 'VENDOR_EVENTS_HEARTBEAT_SECONDS', 15)
+        # Streams are ended periodically and resumed by the EventSource reconnect, so a client that
+        # disconnected without the server noticing only holds its subscription for a bounded time.
+        deadline = time.monotonic() + getattr(settings, 'VENDOR_EVENTS_MAX_STREAM_SECONDS', 300)
+        try:
+            yield 'retry: 1000\n\n'
+            updates = snapshot
+            while time.monotonic() < deadline:
+                if updates:
+                    for vendor_id, metrics in updates.items():
+                        yield 'event: metrics\ndata: %s\n\n' % json.dumps({'vendor_id': vendor_id, **metrics})
+                else:
+                    yield ': heartbeat\n\n'
+                updates = await subscription.get(heartbeat)
+        finally:
+            subscription.close()
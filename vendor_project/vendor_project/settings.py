@@ -47,18 +47,23 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.TokenAuthentication',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'vendor_app.throttling.TokenBucketThrottle',
+    ),
 
 
 }
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'vendor_app.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'vendor_app.profiling.RequestProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'vendor_project.urls'
@@ -133,3 +138,81 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Closed purchase orders not updated for this many days are moved to the archive
+# table by the archive_purchase_orders management command.
+
+PURCHASE_ORDER_ARCHIVE_AFTER_DAYS = 365
+
+# Change log entries younger than this are held back by the change feed, so
+# that slower transactions commit before a cursor moves past their entries.
+# Entries superseded for longer than CHANGE_LOG_RETENTION_DAYS are removed by
+# the compact_change_log management command.
+
+CHANGE_FEED_SETTLE_SECONDS = 2
+
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# Vendor metric updates are pushed to /api/vendors/stream/ subscribers through
+# this broker. InProcessBroker only reaches subscribers of the worker that
+# recomputed the metrics; use vendor_app.events.ChangeLogBroker when running
+# several workers.
+
+VENDOR_EVENTS_BROKER = 'vendor_app.events.InProcessBroker'
+
+VENDOR_EVENTS_HEARTBEAT_SECONDS = 15
+
+VENDOR_EVENTS_MAX_STREAM_SECONDS = 300
+
+# Requests profiled by vendor_app.profiling.RequestProfilingMiddleware are stored here.
+
+REQUEST_PROFILE_DIR = BASE_DIR / 'profiles'
+
+# Admission control (vendor_app.throttling). Each client gets one token bucket
+# per endpoint class, given as (rate, burst); writes have their own 'write'
+# class so that read floods cannot use up their allowance. At most
+# VENDOR_EXPENSIVE_CONCURRENCY list/performance reads run at once per process,
+# further ones are answered with 503 instead of queueing behind them.
+
+VENDOR_THROTTLE_RATES = {
+    'list': ('60/min', 10),
+    'performance': ('300/min', 30),
+    'detail': ('1200/min', 100),
+    'write': ('1200/min', 100),
+}
+
+VENDOR_EXPENSIVE_CONCURRENCY = 4
+
+# Purchase order writes resolve vendor codes through an in-process cache
+# (vendor_app.vendor_codes). Other processes see vendor code changes and
+# deletions once the entries expire.
+
+VENDOR_CODE_CACHE_SIZE = 10000
+
+VENDOR_CODE_CACHE_TTL = 300
+
+VENDOR_CODE_CACHE_NEGATIVE_TTL = 30
+
+# Group commit (vendor_app.batching): concurrent purchase order creates wait up
+# to PURCHASE_ORDER_GROUP_COMMIT_WAIT_MS for each other and are committed in
+# one transaction, so SQLite pays one fsync per batch instead of per order.
+
+PURCHASE_ORDER_GROUP_COMMIT = False
+
+PURCHASE_ORDER_GROUP_COMMIT_WAIT_MS = 5
+
+PURCHASE_ORDER_GROUP_COMMIT_MAX_BATCH = 100
+
+# Response compression (vendor_app.compression). The codec is negotiated from
+# Accept-Encoding in this order of preference; zstd and br are only offered
+# when the zstandard and brotli packages are installed. Compressed bodies of
+# GET responses are cached in memory, up to RESPONSE_COMPRESSION_CACHE_BYTES
+# per process.
+
+RESPONSE_COMPRESSION_CODECS = ('zstd', 'br', 'gzip')
+
+RESPONSE_COMPRESSION_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+
+RESPONSE_COMPRESSION_CACHE_BYTES = 64 * 1024 * 1024
@@ -0,0 +1,50 @@
+"""
+API-only Django settings for vendor_project.
+
+Use with DJANGO_SETTINGS_MODULE=vendor_project.settings_api for the workers serving
+the token-authenticated JSON API. It extends the default settings but drops the
+apps and middleware that only the admin site and the browsable API need, so
+django.setup() and the first request of a new worker do less work.
+
+Management commands (migrate, createsuperuser, ...) and the admin site keep using
+vendor_project.settings.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    'vendor_app',
+    'rest_framework.authtoken',
+    'rest_framework',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'vendor_app.compression.CompressionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'vendor_app.profiling.RequestProfilingMiddleware',
+]
+
+ROOT_URLCONF = 'vendor_project.urls_api'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [],
+        },
+    },
+]
+
+# The browsable API needs templates and static files; API workers only speak JSON.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+    ),
+}
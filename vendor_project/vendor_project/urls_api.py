@@ -0,0 +1,10 @@
+"""vendor_project API-only URL Configuration
+
+Used by vendor_project.settings_api: serves the vendor_app API without the admin
+site and the rest_authtoken endpoints.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('', include('vendor_app.urls')),
+]